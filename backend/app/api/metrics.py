@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.core import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    """Pipeline metrics recorded by the workers, grouped by component."""
+    return metrics.snapshot()
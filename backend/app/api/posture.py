@@ -1,13 +1,18 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from starlette.concurrency import run_in_threadpool
 
 from app.db.session import get_db
 from app.models import database, schemas
-from app.core.posture_detector import get_detector
+from app.core.posture_detector import get_detector, REQUIRED_LANDMARKS
+from app.core.posture_geometry import NUM_LANDMARKS
+from app.core.session_registry import session_state, ACTIVE, MISSING
+from app.core.frame_coalescer import get_frame_coalescer
+from app.core.admission import get_admission_controller, retry_after_header
 
 router = APIRouter(prefix="/posture", tags=["posture"])
 
@@ -17,24 +22,154 @@ class FrameAnalysisRequest(BaseModel):
     frame: str  # base64 encoded image
 
 
-from app.workers.posture_worker import analyze_frame_task
+class LandmarkPoint(BaseModel):
+    # NaN / inf would flow into the angles and be classified and stored
+    x: float = Field(allow_inf_nan=False)  # normalized [0, 1]
+    y: float = Field(allow_inf_nan=False)  # normalized [0, 1]
+    z: Optional[float] = Field(None, allow_inf_nan=False)
+    presence: float = Field(1.0, allow_inf_nan=False)
+
+
+class LandmarkAnalysisRequest(BaseModel):
+    session_id: int
+    # Either all 33 MediaPipe landmarks in order, or a mapping of
+    # landmark index -> point holding at least REQUIRED_LANDMARKS
+    landmarks: List[LandmarkPoint] | dict[int, LandmarkPoint]
+
+    @model_validator(mode="after")
+    def check_landmarks(self):
+        if isinstance(self.landmarks, list):
+            if len(self.landmarks) != NUM_LANDMARKS:
+                raise ValueError(f"Expected {NUM_LANDMARKS} landmarks, got {len(self.landmarks)}")
+        else:
+            invalid = [idx for idx in self.landmarks if not 0 <= idx < NUM_LANDMARKS]
+            if invalid:
+                raise ValueError(f"Landmark indices must be in [0, {NUM_LANDMARKS}), got {invalid}")
+            missing = [idx for idx in REQUIRED_LANDMARKS if idx not in self.landmarks]
+            if missing:
+                raise ValueError(f"Missing required landmarks: {missing}")
+        return self
+
+
+from app.workers.posture_worker import submit_frame, classify_landmarks_task
+
+
+async def _verify_active_session(session_id: int):
+    """Raise unless the session exists and is active (Redis registry, DB on a miss)."""
+    state = await session_state(session_id)
+    if state == MISSING:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if state != ACTIVE:
+        raise HTTPException(status_code=400, detail="Session is not active")
+
+
+async def _admit_frame(session_id: int, queue: str = "posture_queue"):
+    """Raise 429 (with Retry-After) when the session or the queue is over its limit."""
+    decision = await get_admission_controller().check(session_id, queue)
+    if decision.admitted:
+        return
+    
+    raise HTTPException(
+        status_code=429,
+        detail={
+            "reason": decision.reason,
+            "retry_after_seconds": decision.retry_after_seconds,
+            "frame_interval_ms": decision.frame_interval_ms,
+        },
+        headers={"Retry-After": retry_after_header(decision)},
+    )
+
 
 @router.post("/analyze-frame", status_code=202)
-async def analyze_frame(request: FrameAnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_frame(request: FrameAnalysisRequest):
     """
     Queue a camera frame for async processing.
     The result will be broadcast via WebSocket.
     """
-    # Verify session exists and is active
-    session = db.query(database.Session).filter(database.Session.id == request.session_id).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if session.status != "active":
-        raise HTTPException(status_code=400, detail="Session is not active")
+    # Verify session exists and is active, then that we can take the frame
+    await _verify_active_session(request.session_id)
+    await _admit_frame(request.session_id)
     
     # Offload to Celery Worker
-    task = analyze_frame_task.delay(request.frame, request.session_id)
+    try:
+        task = await run_in_threadpool(submit_frame, request.frame, request.session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid base64 frame")
+    
+    return {
+        "status": "processing",
+        "task_id": str(task.id)
+    }
+
+
+@router.post("/analyze-frame/raw", status_code=202)
+async def analyze_frame_raw(
+    request: Request,
+    session_id: Optional[int] = Query(None)
+):
+    """
+    Queue a raw JPEG frame for async processing (no base64).
+    Accepts either an `image/jpeg` body with `?session_id=`, or multipart
+    form data with a `frame` file and a `session_id` field.
+    The result will be broadcast via WebSocket.
+    """
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("frame")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing 'frame' file")
+        frame_bytes = await upload.read()
+        
+        if session_id is None and form.get("session_id") is not None:
+            try:
+                session_id = int(form.get("session_id"))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid session_id")
+    else:
+        frame_bytes = await request.body()
+    
+    if session_id is None:
+        raise HTTPException(status_code=400, detail="session_id is required")
+    
+    if not frame_bytes:
+        raise HTTPException(status_code=400, detail="Empty frame")
+    
+    # Verify session exists and is active, then that we can take the frame
+    await _verify_active_session(session_id)
+    await _admit_frame(session_id)
+    
+    # Offload to Celery Worker (bytes stay binary end to end)
+    task = await run_in_threadpool(submit_frame, frame_bytes, session_id)
+    
+    return {
+        "status": "processing",
+        "task_id": str(task.id)
+    }
+
+
+@router.post("/analyze-landmarks", status_code=202)
+async def analyze_landmarks(request: LandmarkAnalysisRequest):
+    """
+    Queue client-computed pose landmarks for classification only.
+    Skips image decode and model inference entirely.
+    The result will be broadcast via WebSocket.
+    """
+    # Verify session exists and is active, then that we can take the landmarks
+    await _verify_active_session(request.session_id)
+    await _admit_frame(request.session_id, queue="landmark_queue")
+    
+    points = request.landmarks
+    items = enumerate(points) if isinstance(points, list) else points.items()
+    payload = {
+        str(idx): {"x": p.x, "y": p.y, "presence": p.presence}
+        for idx, p in items
+    }
+    
+    # Offload to the lightweight landmark queue
+    task = await run_in_threadpool(classify_landmarks_task.delay, payload, request.session_id)
     
     return {
         "status": "processing",
@@ -87,6 +222,12 @@ def get_current_posture(session_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/session/{session_id}/frames")
+def get_frame_stats(session_id: int):
+    """Frames analyzed vs dropped (superseded / stale) and their queue age."""
+    return {"session_id": session_id, **get_frame_coalescer().stats(session_id)}
+
+
 @router.get("/session/{session_id}/history", response_model=List[schemas.PostureLog])
 def get_posture_history(
     session_id: int,
@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
+from app.core.session_registry import mark_active, mark_inactive
+from app.core.session_events import publish_session_stopped
 from app.db.session import get_db
 from app.models import database, schemas
 
@@ -39,6 +41,9 @@ def start_session(session: schemas.SessionCreate, db: Session = Depends(get_db))
     db.add(db_session)
     db.commit()
     db.refresh(db_session)
+    
+    # Frame admission checks the registry, not the database
+    mark_active(db_session.id)
     return db_session
 
 
@@ -60,6 +65,9 @@ def stop_session(session_id: int, db: Session = Depends(get_db)):
     
     db.commit()
     db.refresh(db_session)
+    
+    mark_inactive(session_id)
+    publish_session_stopped(session_id)
     return db_session
 
 
@@ -72,6 +80,14 @@ def get_session(session_id: int, db: Session = Depends(get_db)):
     return db_session
 
 
+@router.get("/{session_id}/evidence", response_model=List[schemas.EvidenceItem])
+def get_session_evidence(session_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """List a session's evidence images, newest first (from the evidence catalog)."""
+    return db.query(database.EvidenceItem).filter(
+        database.EvidenceItem.session_id == session_id
+    ).order_by(desc(database.EvidenceItem.captured_at)).offset(skip).limit(limit).all()
+
+
 @router.get("/user/{user_id}", response_model=List[schemas.Session])
 def get_user_sessions(
     user_id: int,
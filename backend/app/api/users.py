@@ -2,6 +2,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.settings_cache import publish_settings_change
 from app.db.session import get_db
 from app.models import database, schemas
 
@@ -53,4 +54,7 @@ def update_user_settings(user_id: int, settings_in: schemas.UserSettingsUpdate,
     
     db.commit()
     db.refresh(settings)
+    
+    # Workers cache these per session; drop this user's entries everywhere
+    publish_settings_change(user_id)
     return settings
@@ -1,8 +1,17 @@
+import time
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from app.core.socket_manager import manager
+from app.core.session_registry import session_state, ACTIVE, MISSING
+from app.core.admission import get_admission_controller
+from app.workers.posture_worker import submit_frame
 
 router = APIRouter()
 
+# How often a session channel re-checks that its session is still active
+SESSION_RECHECK_SECONDS = 2.0
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
@@ -15,3 +24,64 @@ async def websocket_endpoint(websocket: WebSocket):
             # await manager.send_personal_message({"message": "Ack"}, websocket)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+
+
+@router.websocket("/ws/sessions/{session_id}")
+async def session_channel(websocket: WebSocket, session_id: int):
+    """
+    Bidirectional per-session channel.
+    The session is validated once at connect time; after that every binary
+    message is a JPEG frame, and posture results for this session come back
+    on the same socket.
+    """
+    await websocket.accept()
+
+    # Verify session exists and is active (once, not per frame)
+    state = await session_state(session_id)
+    error = None
+    if state == MISSING:
+        error = "Session not found"
+    elif state != ACTIVE:
+        error = "Session is not active"
+
+    if error:
+        await websocket.send_json({"type": "ERROR", "detail": error})
+        await websocket.close(code=1008)
+        return
+
+    manager.attach_session(session_id, websocket)
+    checked_at = time.monotonic()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            frame_bytes = message.get("bytes")
+            if frame_bytes and time.monotonic() - checked_at >= SESSION_RECHECK_SECONDS:
+                # stop_session may have run since connect (one Redis GET)
+                checked_at = time.monotonic()
+                if await session_state(session_id) != ACTIVE:
+                    await websocket.send_json({"type": "ERROR", "detail": "Session is not active"})
+                    await websocket.close(code=1008)
+                    break
+
+            if frame_bytes:
+                # Over the session's rate or queue full: drop the frame, tell the client to slow down
+                decision = await get_admission_controller().check(session_id)
+                if not decision.admitted:
+                    await websocket.send_json({
+                        "type": "THROTTLED",
+                        "reason": decision.reason,
+                        "retry_after_seconds": decision.retry_after_seconds,
+                        "frame_interval_ms": decision.frame_interval_ms,
+                    })
+                    continue
+                # Offload to Celery Worker; result returns via send_to_session
+                await run_in_threadpool(submit_frame, frame_bytes, session_id)
+            elif message.get("text") == "ping":
+                await websocket.send_json({"type": "PONG"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.detach_session(session_id, websocket)
@@ -0,0 +1,127 @@
+"""
+Admission control for frame ingestion.
+Without it every frame gets a 202 no matter how far behind the workers are,
+so overload only shows up as an ever-growing posture_queue and Redis memory.
+Each frame request runs one Lua script that checks, atomically:
+
+    queue watermark  the target queue already holds admission_queue_high_watermark
+                     messages -> refused ("overloaded") for every session
+    token bucket     the session has used up its burst and is sending faster
+                     than admission_session_rate frames/s -> refused ("throttled")
+
+A refused frame gets a 429 with Retry-After and the frame interval the
+client should slow down to (WebSocket clients get a THROTTLED message).
+The script also counts decisions in the frame_admission metric group.
+If Redis cannot be reached, frames are admitted (fail open).
+"""
+
+import math
+import time
+from collections import namedtuple
+
+import redis.asyncio as aredis
+
+from app.core.config import settings
+from app.core.metrics import METRICS_PREFIX
+from app.core.model_tiers import POSTURE_QUEUE
+
+ADMITTED, THROTTLED, OVERLOADED = "admitted", "throttled", "overloaded"
+
+AdmissionDecision = namedtuple("AdmissionDecision", [
+    "admitted", "reason", "retry_after_seconds", "frame_interval_ms", "queue_depth",
+])
+
+ADMIT_LUA = """
+local now, rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local watermark = tonumber(ARGV[4])
+
+local depth = redis.call('LLEN', KEYS[2])
+if watermark > 0 and depth >= watermark then
+  redis.call('HINCRBY', KEYS[3], 'overloaded', 1)
+  return {'overloaded', depth, 0}
+end
+
+if rate > 0 then
+  local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+  local reason, retry_ms = 'admitted', 0
+  if tokens < 1 then
+    reason = 'throttled'
+    retry_ms = math.ceil((1 - tokens) / rate * 1000)
+  else
+    tokens = tokens - 1
+  end
+  redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+  -- A full bucket carries no information; let idle sessions expire
+  redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+  redis.call('HINCRBY', KEYS[3], reason, 1)
+  return {reason, depth, retry_ms}
+end
+
+redis.call('HINCRBY', KEYS[3], 'admitted', 1)
+return {'admitted', depth, 0}
+"""
+
+
+class AdmissionController:
+    """Per-session token bucket + global queue watermark, one round-trip per frame."""
+
+    def __init__(self, client, rate: float, burst: int, queue_high_watermark: int, overload_retry_seconds: float):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.queue_high_watermark = queue_high_watermark
+        self.overload_retry_seconds = overload_retry_seconds
+        self._admit = client.register_script(ADMIT_LUA)
+
+    async def check(self, session_id: int, queue: str = POSTURE_QUEUE) -> AdmissionDecision:
+        if not settings.admission_control_enabled:
+            return AdmissionDecision(True, ADMITTED, 0.0, self.frame_interval_ms(0), None)
+        try:
+            reason, depth, retry_ms = await self._admit(
+                keys=[f"session:{session_id}:admission", queue, METRICS_PREFIX + "frame_admission"],
+                args=[time.time(), self.rate, self.burst, self.queue_high_watermark],
+            )
+        except Exception as e:
+            print(f"Admission check failed: {e}")
+            return AdmissionDecision(True, ADMITTED, 0.0, self.frame_interval_ms(0), None)
+
+        depth = int(depth)
+        if reason == OVERLOADED:
+            retry_after = self.overload_retry_seconds
+        else:
+            retry_after = int(retry_ms) / 1000
+        return AdmissionDecision(reason == ADMITTED, reason, retry_after, self.frame_interval_ms(depth), depth)
+
+    def frame_interval_ms(self, queue_depth: int) -> int:
+        """
+        Interval the client should send frames at: the sustained session rate,
+        stretched in proportion to how far the queue is past its watermark.
+        """
+        interval = 1000 / self.rate if self.rate > 0 else 0
+        if self.queue_high_watermark > 0 and queue_depth >= self.queue_high_watermark:
+            interval = max(interval, self.overload_retry_seconds * 1000) * queue_depth / self.queue_high_watermark
+        return math.ceil(interval)
+
+
+def retry_after_header(decision: AdmissionDecision) -> str:
+    """Retry-After takes whole seconds; never advertise 0."""
+    return str(max(1, math.ceil(decision.retry_after_seconds)))
+
+
+# Global instance (per API process)
+_controller = None
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            aredis.from_url(settings.redis_url, decode_responses=True),
+            rate=settings.admission_session_rate,
+            burst=settings.admission_session_burst,
+            queue_high_watermark=settings.admission_queue_high_watermark,
+            overload_retry_seconds=settings.admission_overload_retry_seconds,
+        )
+    return _controller
@@ -0,0 +1,173 @@
+"""
+Posture alert rules engine.
+Each analyzed frame advances a small per-session state machine kept in one
+Redis hash (session:{id}:alerts). The whole step (read state, apply every
+rule, write state, decide which alerts fire) is a single Lua script, so it
+is atomic across workers and costs one round-trip per frame (or one per
+batch when pipelined).
+
+Rules (0 disables a rule):
+    slouch     SLOUCHING continuously for slouch_seconds -> SLOUCH_ALERT
+    too_close  TOO_CLOSE continuously for too_close_seconds -> DISTANCE_WARNING
+    break      present (any status but NO_PERSON) for break_minutes without
+               an absence of at least break_away_seconds -> BREAK_REMINDER
+               (a gap with no frames at all counts as an absence; it also
+               restarts the slouch / too_close streaks)
+Each rule has its own cooldown. Defaults come from Settings; a user can
+override any of them under User.preferences["alerts"].
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+AlertRules = namedtuple("AlertRules", [
+    "slouch_seconds", "slouch_cooldown_seconds",
+    "too_close_seconds", "too_close_cooldown_seconds",
+    "break_seconds", "break_cooldown_seconds", "break_away_seconds",
+])
+
+# User.preferences["alerts"] key -> (AlertRules field, multiplier to seconds)
+PREFERENCE_KEYS = {
+    "slouch_seconds": ("slouch_seconds", 1),
+    "slouch_cooldown_seconds": ("slouch_cooldown_seconds", 1),
+    "too_close_seconds": ("too_close_seconds", 1),
+    "too_close_cooldown_seconds": ("too_close_cooldown_seconds", 1),
+    "break_minutes": ("break_seconds", 60),
+    "break_cooldown_minutes": ("break_cooldown_seconds", 60),
+    "break_away_seconds": ("break_away_seconds", 1),
+}
+
+# Idle sessions' state expires on its own
+STATE_TTL_SECONDS = 6 * 3600
+
+ALERT_STEP_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local status = ARGV[2]
+local slouch_s, slouch_cd = tonumber(ARGV[3]), tonumber(ARGV[4])
+local close_s, close_cd = tonumber(ARGV[5]), tonumber(ARGV[6])
+local break_s, break_cd, away_s = tonumber(ARGV[7]), tonumber(ARGV[8]), tonumber(ARGV[9])
+local ttl = tonumber(ARGV[10])
+
+local state = redis.call('HMGET', key, 'status', 'since', 'present_since', 'absent_since',
+                         'cd_slouch', 'cd_close', 'cd_break', 'last_seen')
+local since = tonumber(state[2])
+local present_since, absent_since = tonumber(state[3]), tonumber(state[4])
+local cd_slouch, cd_close, cd_break = tonumber(state[5]), tonumber(state[6]), tonumber(state[7])
+local last_seen = tonumber(state[8])
+
+if status ~= state[1] then
+  since = now
+end
+
+-- No frames at all for break_away_seconds (camera off, app closed) is a break
+-- too, and ends whatever status streak was running (0 = no gap detection)
+if away_s > 0 and last_seen and now - last_seen >= away_s then
+  since = now
+  present_since = nil
+  absent_since = nil
+end
+
+local function due(threshold, started, cooldown_until)
+  return threshold > 0 and started ~= nil and now - started >= threshold
+         and (cooldown_until == nil or now >= cooldown_until)
+end
+
+local fired = {}
+if status == 'SLOUCHING' and due(slouch_s, since, cd_slouch) then
+  table.insert(fired, 'SLOUCH_ALERT')
+  cd_slouch = now + slouch_cd
+elseif status == 'TOO_CLOSE' and due(close_s, since, cd_close) then
+  table.insert(fired, 'DISTANCE_WARNING')
+  cd_close = now + close_cd
+end
+
+if status == 'NO_PERSON' then
+  absent_since = absent_since or now
+  if present_since and now - absent_since >= away_s then
+    present_since = nil  -- took a break
+  end
+else
+  absent_since = nil
+  present_since = present_since or now
+  if due(break_s, present_since, cd_break) then
+    table.insert(fired, 'BREAK_REMINDER')
+    cd_break = now + break_cd
+  end
+end
+
+redis.call('HSET', key, 'status', status, 'since', since, 'last_seen', now)
+local fields = {present_since = present_since, absent_since = absent_since,
+                cd_slouch = cd_slouch, cd_close = cd_close, cd_break = cd_break}
+for _, name in ipairs({'present_since', 'absent_since', 'cd_slouch', 'cd_close', 'cd_break'}) do
+  if fields[name] then
+    redis.call('HSET', key, name, fields[name])
+  else
+    redis.call('HDEL', key, name)
+  end
+end
+redis.call('EXPIRE', key, ttl)
+return fired
+"""
+
+
+def default_rules() -> AlertRules:
+    return AlertRules(
+        slouch_seconds=settings.alert_slouch_seconds,
+        slouch_cooldown_seconds=settings.alert_slouch_cooldown_seconds,
+        too_close_seconds=settings.alert_too_close_seconds,
+        too_close_cooldown_seconds=settings.alert_too_close_cooldown_seconds,
+        break_seconds=settings.alert_break_minutes * 60,
+        break_cooldown_seconds=settings.alert_break_cooldown_minutes * 60,
+        break_away_seconds=settings.alert_break_away_seconds,
+    )
+
+
+def rules_from_preferences(preferences: Optional[Dict]) -> AlertRules:
+    """
+    Defaults overridden by User.preferences["alerts"], e.g.
+    {"slouch_seconds": 15, "too_close_seconds": 20, "break_minutes": 50}.
+    Unknown keys and non-numeric values are ignored.
+    """
+    rules = default_rules()._asdict()
+    overrides = (preferences or {}).get("alerts") or {}
+    for name, value in overrides.items():
+        if name not in PREFERENCE_KEYS:
+            continue
+        field, factor = PREFERENCE_KEYS[name]
+        try:
+            rules[field] = max(0.0, float(value)) * factor
+        except (TypeError, ValueError):
+            pass
+    return AlertRules(**rules)
+
+
+def alert_message(alert_type: str, rules: AlertRules) -> str:
+    if alert_type == "SLOUCH_ALERT":
+        return f"You have been slouching for over {rules.slouch_seconds:g} seconds!"
+    if alert_type == "DISTANCE_WARNING":
+        return f"You have been too close to the screen for over {rules.too_close_seconds:g} seconds!"
+    return f"You have been sitting for {rules.break_seconds / 60:g} minutes. Time for a break!"
+
+
+class AlertEngine:
+    """Runs the alert step script for a batch of (session_id, status, rules) in one pipeline."""
+
+    def __init__(self, client):
+        self._client = client
+        self._step = client.register_script(ALERT_STEP_LUA)
+
+    def evaluate(self, events: List[tuple], now: float) -> List[List[str]]:
+        """Alert types fired for each (session_id, posture_status, AlertRules) event, in order."""
+        pipe = self._client.pipeline(transaction=False)
+        for session_id, status, rules in events:
+            self._step(keys=[f"session:{session_id}:alerts"], args=[
+                now, status,
+                rules.slouch_seconds, rules.slouch_cooldown_seconds,
+                rules.too_close_seconds, rules.too_close_cooldown_seconds,
+                rules.break_seconds, rules.break_cooldown_seconds, rules.break_away_seconds,
+                STATE_TTL_SECONDS,
+            ], client=pipe)
+        return [list(fired or []) for fired in pipe.execute()]
@@ -0,0 +1,93 @@
+"""
+Face anonymization for evidence images.
+The face box comes from the skeleton landmarks (nose and ears); the region
+is then obscured in place with one of the strategies below. All but the
+legacy Gaussian work at a fraction of the ROI resolution, so their cost
+barely depends on how large the face is.
+
+    pixelate   downscale to a coarse grid, upscale with nearest neighbour
+    fast_blur  downscale, small Gaussian, upscale (looks like a big blur)
+    mask       solid fill
+    gaussian   full-resolution 99x99 Gaussian (the original behaviour)
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+PIXELATE_BLOCKS = 12  # blocks across the face box
+FAST_BLUR_SIZE = 24  # working resolution (px) of the downscaled ROI
+MASK_COLOR = (40, 40, 40)  # BGR
+
+
+def face_box(landmarks: Dict, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Face box (x1, y1, x2, y2) in pixels from skeleton landmarks
+    ({'0': nose, '7': left ear, '8': right ear}, normalized coordinates).
+    """
+    if not landmarks:
+        return None
+
+    nose_lm = landmarks.get('0', {'x': 0.5, 'y': 0.5})
+    ear_l_lm = landmarks.get('7')
+    ear_r_lm = landmarks.get('8')
+
+    nose_x = int(nose_lm.get('x', 0.5) * width)
+    nose_y = int(nose_lm.get('y', 0.5) * height)
+
+    # Determine dynamic box size based on ears if available
+    if ear_l_lm and ear_r_lm:
+        face_width = abs(ear_l_lm.get('x', 0.5) - ear_r_lm.get('x', 0.5)) * width * 2.0  # 2x ear distance
+        box_radius = max(int(face_width / 2), int(width * 0.1))  # at least 10% of width
+    else:
+        box_radius = int(width * 0.15)  # fallback: 15% of width
+
+    x1, y1 = max(0, nose_x - box_radius), max(0, nose_y - box_radius)
+    x2, y2 = min(width, nose_x + box_radius), min(height, nose_y + box_radius)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+def pixelate(roi: np.ndarray) -> np.ndarray:
+    h, w = roi.shape[:2]
+    blocks = max(1, min(PIXELATE_BLOCKS, w, h))
+    small = cv2.resize(roi, (blocks, blocks), interpolation=cv2.INTER_AREA)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+
+
+def fast_blur(roi: np.ndarray) -> np.ndarray:
+    h, w = roi.shape[:2]
+    size = max(1, min(FAST_BLUR_SIZE, w, h))
+    small = cv2.resize(roi, (size, size), interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (5, 5), 0)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+
+
+def mask(roi: np.ndarray) -> np.ndarray:
+    roi[:] = MASK_COLOR
+    return roi
+
+
+def gaussian(roi: np.ndarray) -> np.ndarray:
+    return cv2.GaussianBlur(roi, (99, 99), 30)
+
+
+ANONYMIZERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "pixelate": pixelate,
+    "fast_blur": fast_blur,
+    "mask": mask,
+    "gaussian": gaussian,
+}
+
+
+def anonymize_face(img: np.ndarray, landmarks: Dict, strategy: str = "pixelate") -> bool:
+    """Obscure the face region of a BGR image in place. Returns whether anything changed."""
+    h, w = img.shape[:2]
+    box = face_box(landmarks, w, h)
+    if box is None:
+        return False
+    x1, y1, x2, y2 = box
+    img[y1:y2, x1:x2] = ANONYMIZERS[strategy](img[y1:y2, x1:x2])
+    return True
@@ -11,30 +11,46 @@ celery_app = Celery(
     "posture_tasks",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["app.workers.posture_worker", "app.workers.analysis_worker", "app.workers.notification_worker", "app.workers.report_worker"]
+    include=["app.workers.posture_worker", "app.workers.analysis_worker", "app.workers.notification_worker", "app.workers.report_worker", "app.workers.reclassify_worker", "app.workers.evidence_worker"]
 )
 
 # Configuration
 celery_app.conf.update(
     task_serializer="json",
-    accept_content=["json"],
+    accept_content=["json", "msgpack"],  # msgpack carries raw frame bytes
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
     task_queues=(
         Queue("posture_queue", Exchange("posture"), routing_key="posture"),
+        Queue("landmark_queue", Exchange("landmark"), routing_key="landmark"),
         Queue("analysis_queue", Exchange("analysis"), routing_key="analysis"),
         Queue("notification_queue", Exchange("notification"), routing_key="notification"),
         Queue("scheduled_queue", Exchange("scheduled"), routing_key="scheduled"),
     ),
     task_routes={
         "app.workers.posture_worker.analyze_frame_task": {"queue": "posture_queue"},
+        "app.workers.posture_worker.analyze_frame_bytes_task": {"queue": "posture_queue"},
+        "app.workers.posture_worker.analyze_frame_ref_task": {"queue": "posture_queue"},
+        "app.workers.posture_worker.analyze_frame_batch_task": {"queue": "posture_queue"},
+        "app.workers.posture_worker.classify_landmarks_task": {"queue": "landmark_queue"},
         "app.workers.analysis_worker.analyze_patterns_task": {"queue": "analysis_queue"},
+        "app.workers.reclassify_worker.reclassify_posture_logs_task": {"queue": "analysis_queue"},
         "app.workers.notification_worker.send_notification_task": {"queue": "notification_queue"},
         "app.workers.report_worker.generate_daily_report_task": {"queue": "scheduled_queue"},
+        "app.workers.evidence_worker.prune_evidence_task": {"queue": "scheduled_queue"},
     },
 )
 
+# The micro-batcher can only fill a batch with messages the worker has prefetched
+if settings.posture_batch_enabled:
+    celery_app.conf.worker_prefetch_multiplier = max(4, settings.posture_batch_size)
+
+# Child processes load and warm the pose model before accepting tasks
+# (posture_worker.preload_detector); give them time to do it
+if settings.detector_preload:
+    celery_app.conf.worker_proc_alive_timeout = settings.detector_warmup_timeout_seconds
+
 # Schedule: Run daily report at 6:00 PM
 celery_app.conf.beat_schedule = {
     "daily-report-task": {
@@ -42,6 +58,11 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(hour=18, minute=0), 
         "args": (1,), # Default User ID 1 for MVP
     },
+    # Evidence retention for every user (saves only prune the saving user's items)
+    "prune-evidence-task": {
+        "task": "app.workers.evidence_worker.prune_evidence_task",
+        "schedule": crontab(minute=15),
+    },
 }
 
 if __name__ == "__main__":
@@ -22,6 +22,102 @@ class Settings(BaseSettings):
     emails_from_email: str | None = "posturemonitor@example.com"
     emails_to_email: str | None = None  # Default recipient for reports
     
+    # Posture queue consumer
+    posture_batch_enabled: bool = False  # micro-batch frames instead of one task per frame
+    posture_batch_size: int = 16  # flush after this many frames...
+    posture_batch_linger_ms: int = 50  # ...or after this long, whichever comes first
+    
+    # PostureLog write-behind buffer
+    posture_log_buffer_enabled: bool = True  # False = insert + commit inside the task
+    posture_log_flush_rows: int = 500  # flush once this many rows are buffered...
+    posture_log_flush_seconds: float = 1.0  # ...or the oldest row is this old (max loss window on a crash)
+    posture_log_max_buffer_rows: int = 20000  # rows kept while the DB is down; oldest dropped beyond this
+    
+    # Active-session registry (Redis) for frame admission
+    session_registry_ttl_seconds: int = 3600  # active entries; re-checked against the DB after this
+    session_registry_negative_ttl_seconds: int = 30  # missing / inactive entries
+    
+    # Alert rules (defaults; users override them in preferences["alerts"]; 0 disables a rule)
+    alert_slouch_seconds: float = 8.0  # continuous slouching before SLOUCH_ALERT
+    alert_slouch_cooldown_seconds: float = 120.0
+    alert_too_close_seconds: float = 0.0  # continuous TOO_CLOSE before DISTANCE_WARNING
+    alert_too_close_cooldown_seconds: float = 120.0
+    alert_break_minutes: float = 0.0  # time at the desk before BREAK_REMINDER
+    alert_break_cooldown_minutes: float = 10.0
+    alert_break_away_seconds: float = 120.0  # absence that counts as a break
+    
+    # Posture classification
+    classifier_version: int = 1  # threshold set from posture_geometry.CLASSIFIER_VERSIONS
+    reclassify_chunk_size: int = 5000  # rows per chunk in the bulk re-classification job
+    
+    # Frame blob store: frames wait here, task messages carry only a reference
+    frame_blob_store: str = "redis"  # redis | shm (API and workers on one host) | none (inline in the message)
+    frame_blob_ttl_seconds: int = 30  # unconsumed frames expire after this
+    frame_blob_shm_dir: str = "/dev/shm/posture-frames"
+    
+    # Ingestion admission control (429 + Retry-After on the frame endpoints)
+    admission_control_enabled: bool = True
+    admission_session_rate: float = 10.0  # sustained frames/s per session (0 = no per-session limit)
+    admission_session_burst: int = 20  # frames a session may send in a burst above that rate
+    admission_queue_high_watermark: int = 500  # queue depth at which new frames are refused (0 = no limit)
+    admission_overload_retry_seconds: float = 2.0  # Retry-After while the queue is above the watermark
+    
+    # Stale frame handling
+    frame_coalescing_enabled: bool = True  # analyze only the newest queued frame of each session
+    frame_max_age_seconds: float = 10.0  # discard frames older than this unanalyzed (0 = no limit)
+    
+    # Frame decoding
+    # Long side (px) JPEGs are scaled down to at decode time (libjpeg 1/2, 1/4, 1/8).
+    # 0 decodes at full resolution.
+    frame_decode_target_size: int = 320
+    
+    # Near-duplicate frame reuse
+    frame_dedup_enabled: bool = True
+    frame_dedup_threshold: float = 2.5  # mean abs diff of 32x24 gray thumbnails (0-255)
+    frame_dedup_max_age_seconds: float = 5.0  # always re-run inference after this long
+    
+    # Pose landmarker
+    detector_pool_size: int = 1  # detector instances per process; match --concurrency with --pool threads
+    # Per-session RunningMode.VIDEO landmarkers (tracking). Off by default: prefork
+    # spreads a session's frames over every child, so each child would load a model
+    # per seat and rarely see consecutive frames. Only worth it with a few sessions
+    # per worker or session-affine routing.
+    detector_video_mode: bool = False
+    # Directory holding pose_landmarker_{lite,full,heavy}.task ("" = app/models).
+    # The container image downloads them to /opt/models, outside the ./backend bind mount.
+    models_dir: str = ""
+    
+    detector_max_sessions: int = 8  # VIDEO landmarkers kept per worker process (LRU)
+    detector_session_idle_seconds: float = 60.0  # evict a session's landmarker after this idle time
+    detector_default_tier: str = "heavy"  # lite | full | heavy
+    detector_adaptive_tiers: bool = True  # degrade to lighter models under load
+    detector_latency_budget_ms: float = 150.0  # per-frame inference budget
+    detector_queue_high_watermark: int = 50  # posture_queue depth that forces a step down
+    detector_queue_low_watermark: int = 5  # depth at or below which we may step back up
+    detector_tier_cooldown_seconds: float = 10.0  # minimum time between tier changes
+    detector_preload: bool = True  # load and warm the model when a worker process starts
+    detector_warmup_timeout_seconds: float = 120.0  # worker_proc_alive_timeout while preloading
+    # Warm every model tier at start instead of just the active one. Faster first tier
+    # switch, but each process (x detector_pool_size) then keeps all three models resident.
+    detector_warmup_all_tiers: bool = False
+    detector_freeze_parent_heap: bool = True  # gc.freeze() in the prefork parent so children keep its pages shared
+    detector_roi_mode: bool = False  # crop to the last body box (overrides video mode)
+    detector_roi_padding: float = 0.25  # box padding, fraction of box size per side
+    detector_roi_min_presence: float = 0.5  # below this, redo the frame at full size
+    detector_roi_border_margin: float = 0.02  # landmark this close to a crop edge -> full frame
+    
+    # Evidence locker (write-behind capture of slouching frames)
+    evidence_queue_size: int = 32  # frames waiting for the writer thread; extra evidence is dropped
+    evidence_min_interval_seconds: float = 10.0  # per-session minimum time between captures
+    evidence_phash_distance: int = 6  # hamming distance (of 64 bits) below which an image is a duplicate
+    evidence_format: str = "jpg"  # jpg | webp
+    evidence_quality: int = 80  # encoder quality (0-100)
+    evidence_anonymizer: str = "pixelate"  # pixelate | fast_blur | mask | gaussian (legacy, slowest)
+    evidence_session_quota_mb: int = 50  # per-session byte quota, oldest evicted first (0 = unlimited)
+    evidence_user_quota_mb: int = 500  # per-user byte quota, oldest evicted first (0 = unlimited)
+    evidence_retention_days: int = 30  # prune older evidence (0 = keep forever)
+    settings_cache_ttl_seconds: float = 300.0  # worker cache of session -> user settings (pub/sub invalidated)
+    
     # App
     app_name: str = "Posture Monitor API"
     debug: bool = True
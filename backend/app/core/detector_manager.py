@@ -0,0 +1,174 @@
+"""
+Session-aware landmarker management.
+Keeps one RunningMode.VIDEO PoseLandmarker per active session so MediaPipe's
+tracker can skip the person-detection stage on consecutive frames.
+Instances are bounded by an LRU cap and an idle timeout so worker memory
+stays flat no matter how many sessions are open.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class _SessionTrack:
+    """One session's VIDEO-mode landmarker and its timestamp clock."""
+
+    __slots__ = ("landmarker", "tier", "last_timestamp_ms", "last_used", "lock")
+
+    def __init__(self, landmarker, tier):
+        self.landmarker = landmarker
+        self.tier = tier
+        self.last_timestamp_ms = -1
+        self.last_used = time.monotonic()
+        # detect_for_video is not re-entrant for one landmarker
+        self.lock = threading.Lock()
+
+
+class SessionLandmarkers:
+    """LRU + idle-timeout pool of per-session VIDEO-mode landmarkers."""
+
+    def __init__(self, factory: Callable, max_sessions: int, idle_timeout_seconds: float):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._tracks: "OrderedDict[int, _SessionTrack]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def detect(self, session_id: int, mp_image, tier=None):
+        """
+        Run detect_for_video for a session with a strictly increasing timestamp.
+        `tier` is passed to the factory; a tier change rebuilds the session's landmarker.
+        """
+        track = self._acquire(session_id, tier)
+        with track.lock:
+            # MediaPipe requires monotonically increasing timestamps per landmarker
+            timestamp_ms = max(track.last_timestamp_ms + 1, int(time.monotonic() * 1000))
+            result = track.landmarker.detect_for_video(mp_image, timestamp_ms)
+            track.last_timestamp_ms = timestamp_ms
+            track.last_used = time.monotonic()
+        return result
+
+    def release(self, session_id: int):
+        """Drop a session's landmarker (e.g. when the session stops)."""
+        with self._lock:
+            track = self._tracks.pop(session_id, None)
+        if track:
+            self._close(track)
+
+    def close_all(self):
+        with self._lock:
+            tracks = list(self._tracks.values())
+            self._tracks.clear()
+        for track in tracks:
+            self._close(track)
+
+    def _acquire(self, session_id: int, tier) -> _SessionTrack:
+        evicted = []
+        with self._lock:
+            track = self._lookup(session_id, tier, evicted)
+
+        if track is None:
+            # Building a landmarker is a full model load: do it outside the
+            # lock so other sessions in this process are not blocked meanwhile
+            built = _SessionTrack(self.factory(tier), tier)
+            with self._lock:
+                track = self._lookup(session_id, tier, evicted)
+                if track is None:
+                    track = built
+                    self._tracks[session_id] = track
+                    # LRU cap
+                    while len(self._tracks) > self.max_sessions:
+                        _, old = self._tracks.popitem(last=False)
+                        evicted.append(old)
+                else:
+                    # Another thread built one for this session first
+                    evicted.append(built)
+
+        for old in evicted:
+            self._close(old)
+        return track
+
+    def _lookup(self, session_id: int, tier, evicted: list):
+        """The session's live track for this tier, or None. Caller holds self._lock."""
+        now = time.monotonic()
+        # Idle sweep at most once a second
+        if now - self._last_sweep > 1.0:
+            self._last_sweep = now
+            for sid in [sid for sid, t in self._tracks.items()
+                        if now - t.last_used > self.idle_timeout_seconds]:
+                evicted.append(self._tracks.pop(sid))
+
+        track = self._tracks.get(session_id)
+        if track is not None and track.tier != tier:
+            # Model tier changed: tracking restarts on the new model
+            evicted.append(self._tracks.pop(session_id))
+            track = None
+
+        if track is not None:
+            self._tracks.move_to_end(session_id)
+            track.last_used = now
+        return track
+
+    @staticmethod
+    def _close(track: _SessionTrack):
+        # Wait for an in-flight detect on this track to finish
+        with track.lock:
+            try:
+                track.landmarker.close()
+            except Exception as e:
+                print(f"Error closing landmarker: {e}")
+
+
+class RoiTracker:
+    """
+    Per-session padded body bounding box from the previous frame's landmarks.
+    Boxes are stored in normalized coordinates so they survive any change in
+    decode scale; the LRU cap keeps memory bounded.
+    """
+
+    def __init__(self, padding: float, min_size: float = 0.3, max_sessions: int = 1024):
+        self.padding = padding
+        self.min_size = min_size
+        self.max_sessions = max_sessions
+        self._boxes: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def crop_box(self, session_id: int, width: int, height: int):
+        """Pixel crop (x0, y0, x1, y1) for this session, or None without history."""
+        with self._lock:
+            box = self._boxes.get(session_id)
+        if box is None:
+            return None
+
+        x0, y0, x1, y1 = box
+        px0, py0 = max(0, int(x0 * width)), max(0, int(y0 * height))
+        px1, py1 = min(width, int(round(x1 * width))), min(height, int(round(y1 * height)))
+        if px1 - px0 < 16 or py1 - py0 < 16:
+            return None
+        return px0, py0, px1, py1
+
+    def update(self, session_id: int, points):
+        """Store a padded box around the given (x, y) normalized points."""
+        xs = [min(max(p.x, 0.0), 1.0) for p in points]
+        ys = [min(max(p.y, 0.0), 1.0) for p in points]
+        cx, cy = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+        half_w = max((max(xs) - min(xs)) * (1 + 2 * self.padding), self.min_size) / 2
+        half_h = max((max(ys) - min(ys)) * (1 + 2 * self.padding), self.min_size) / 2
+        box = (max(0.0, cx - half_w), max(0.0, cy - half_h),
+               min(1.0, cx + half_w), min(1.0, cy + half_h))
+
+        with self._lock:
+            self._boxes[session_id] = box
+            self._boxes.move_to_end(session_id)
+            while len(self._boxes) > self.max_sessions:
+                self._boxes.popitem(last=False)
+
+    def forget(self, session_id: int):
+        with self._lock:
+            self._boxes.pop(session_id, None)
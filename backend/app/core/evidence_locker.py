@@ -0,0 +1,242 @@
+"""
+Write-behind evidence locker.
+Slouching frames are handed to a bounded queue and a background thread does
+the face anonymization, encode and disk write (through the indexed EvidenceStore),
+so inference never waits on the disk.
+Capture is throttled per session (a minimum interval between captures) and
+perceptually deduplicated (a 64-bit DCT hash against the last saved image of
+the session), so a long slouch yields a handful of images, not hundreds.
+
+The throttle and the last hash are shared through Redis
+(session:{id}:evidence, session:{id}:evidence_hash), so a session whose frames
+are spread over every prefork child is still captured at most once per
+interval. A per-process copy is a cheap first filter and the fallback when
+Redis is unreachable.
+
+When the queue is full, new evidence is dropped rather than blocking the
+worker.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+import redis
+
+from app.core import metrics
+from app.core.anonymizer import ANONYMIZERS, anonymize_face
+from app.core.config import settings
+from app.core.evidence_store import MB, EvidenceStore
+from app.core.frame import Frame
+
+EVIDENCE_DIR = "/app/data/evidence"
+
+# The last saved hash only matters while the session keeps slouching
+HASH_TTL_SECONDS = 6 * 3600
+
+# Encoder parameters per output format
+ENCODERS = {
+    "jpg": lambda quality: [cv2.IMWRITE_JPEG_QUALITY, quality],
+    "webp": lambda quality: [cv2.IMWRITE_WEBP_QUALITY, quality],
+}
+
+
+def phash(img: np.ndarray) -> int:
+    """64-bit perceptual hash: sign of the low 8x8 DCT band against its median."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])  # DC term would dominate the median
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class EvidenceLocker:
+    """Bounded write-behind queue plus one writer thread."""
+
+    def __init__(self, store: EvidenceStore, max_queue: int, min_interval_seconds: float,
+                 phash_distance: int, image_format: str, quality: int, anonymizer: str = "pixelate",
+                 max_sessions: int = 1024, client=None):
+        if image_format not in ENCODERS:
+            raise ValueError(f"Unsupported evidence format: {image_format}")
+        if anonymizer not in ANONYMIZERS:
+            raise ValueError(f"Unsupported evidence anonymizer: {anonymizer}")
+        self.store = store
+        self.min_interval_seconds = min_interval_seconds
+        self.phash_distance = phash_distance
+        self.image_format = image_format
+        self.encode_params = ENCODERS[image_format](quality)
+        self.anonymizer = anonymizer
+        self.max_sessions = max_sessions
+        self._client = client
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # session_id -> last accepted capture time (monotonic) / last saved hash
+        self._last_capture: "OrderedDict[int, float]" = OrderedDict()
+        self._last_hash: "OrderedDict[int, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, frame: Frame, session_id: int, user_id: int, landmarks: Optional[Dict], blur_enabled: bool) -> bool:
+        """
+        Hand a frame over for capture (called from the inference path; never blocks).
+        The frame must not be modified by the caller afterwards.
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_capture.get(session_id)
+            if last is not None and now - last < self.min_interval_seconds:
+                metrics.record("evidence", throttled=1)
+                return False
+            self._remember(self._last_capture, session_id, now)
+
+        # Across processes: the first worker to claim the interval captures
+        if not self._claim(session_id):
+            metrics.record("evidence", throttled=1)
+            return False
+
+        try:
+            self._queue.put_nowait((frame, session_id, user_id, landmarks, blur_enabled, datetime.utcnow()))
+        except queue.Full:
+            metrics.record("evidence", dropped=1)
+            self._release(session_id)
+            return False
+
+        self._ensure_thread()
+        return True
+
+    def _claim(self, session_id: int) -> bool:
+        if self._client is None or self.min_interval_seconds <= 0:
+            return True
+        try:
+            return bool(self._client.set(f"session:{session_id}:evidence", 1, nx=True,
+                                         px=int(self.min_interval_seconds * 1000)))
+        except Exception as e:
+            print(f"Evidence throttle check failed: {e}")
+            return True
+
+    def _release(self, session_id: int):
+        if self._client is None:
+            return
+        try:
+            self._client.delete(f"session:{session_id}:evidence")
+        except Exception as e:
+            print(f"Evidence throttle release failed: {e}")
+
+    def _previous_hash(self, session_id: int) -> Optional[int]:
+        if self._client is not None:
+            try:
+                value = self._client.get(f"session:{session_id}:evidence_hash")
+                return int(value) if value is not None else None
+            except Exception as e:
+                print(f"Evidence hash lookup failed: {e}")
+        with self._lock:
+            return self._last_hash.get(session_id)
+
+    def _store_hash(self, session_id: int, digest: int):
+        with self._lock:
+            self._remember(self._last_hash, session_id, digest)
+        if self._client is not None:
+            try:
+                self._client.set(f"session:{session_id}:evidence_hash", digest, ex=HASH_TTL_SECONDS)
+            except Exception as e:
+                print(f"Evidence hash update failed: {e}")
+
+    def forget(self, session_id: int):
+        with self._lock:
+            self._last_capture.pop(session_id, None)
+            self._last_hash.pop(session_id, None)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued evidence is written (e.g. on worker shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="evidence-locker", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                print(f"❌ Evidence Locker Failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, frame: Frame, session_id: int, user_id: int, landmarks: Optional[Dict], blur_enabled: bool,
+               captured_at: datetime):
+        # Inference may have used a reduced decode; evidence is saved at full size
+        img = frame.full_resolution().bgr
+
+        # Perceptual dedup against the last saved image of this session
+        digest = phash(img)
+        previous = self._previous_hash(session_id)
+        if previous is not None and hamming(previous, digest) <= self.phash_distance:
+            metrics.record("evidence", duplicates=1)
+            return
+
+        start = time.perf_counter()
+        if blur_enabled:
+            anonymize_face(img, landmarks, self.anonymizer)
+
+        ok, buf = cv2.imencode(f".{self.image_format}", img, self.encode_params)
+        if not ok:
+            raise RuntimeError(f"{self.image_format} encode failed")
+
+        filename = self.store.save(user_id, session_id, captured_at, buf.tobytes(), self.image_format)
+
+        self._store_hash(session_id, digest)
+        metrics.record("evidence", saved=1, bytes=len(buf), write_ms=(time.perf_counter() - start) * 1000)
+        print(f"📸 Evidence Locker: Saved {filename}")
+
+    def _remember(self, entries: OrderedDict, session_id: int, value):
+        entries[session_id] = value
+        entries.move_to_end(session_id)
+        while len(entries) > self.max_sessions:
+            entries.popitem(last=False)
+
+
+def get_evidence_store() -> EvidenceStore:
+    return EvidenceStore(
+        root=EVIDENCE_DIR,
+        session_quota_bytes=settings.evidence_session_quota_mb * MB,
+        user_quota_bytes=settings.evidence_user_quota_mb * MB,
+        retention_days=settings.evidence_retention_days,
+    )
+
+
+# Global instance (per worker process)
+_locker = None
+
+def get_evidence_locker() -> EvidenceLocker:
+    global _locker
+    if _locker is None:
+        _locker = EvidenceLocker(
+            store=get_evidence_store(),
+            max_queue=settings.evidence_queue_size,
+            min_interval_seconds=settings.evidence_min_interval_seconds,
+            phash_distance=settings.evidence_phash_distance,
+            image_format=settings.evidence_format,
+            quality=settings.evidence_quality,
+            anonymizer=settings.evidence_anonymizer,
+            client=redis.from_url(settings.redis_url, decode_responses=True),
+        )
+    return _locker
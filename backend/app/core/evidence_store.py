@@ -0,0 +1,150 @@
+"""
+Indexed evidence store.
+Every evidence image is recorded in the evidence_items table (session, user,
+capture time, size, path), and files are sharded by user and day:
+
+    {root}/user_{user_id}/{YYYYMMDD}/session_{session_id}_{HHMMSSmmm}.{ext}
+
+so no directory grows without bound and listing or pruning is an indexed
+query instead of a directory scan. Per-session and per-user byte quotas are
+enforced on every save by evicting the oldest items first, and the saving
+user's items older than the retention window are pruned along the way.
+prune_expired() enforces retention for everyone else (see
+app.workers.evidence_worker, run by Celery beat).
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import func
+
+from app.core import metrics
+from app.db.session import SessionLocal
+from app.models import database
+
+MB = 1024 * 1024
+
+# Most items evicted per scope per save (a save only ever adds one image,
+# so a lowered quota converges over a few saves)
+EVICTION_BATCH = 100
+
+
+class EvidenceStore:
+    """Writes evidence files and keeps the catalog and quotas in line."""
+
+    def __init__(self, root: str, session_quota_bytes: int, user_quota_bytes: int, retention_days: int):
+        self.root = root
+        self.session_quota_bytes = session_quota_bytes  # 0 = unlimited
+        self.user_quota_bytes = user_quota_bytes  # 0 = unlimited
+        self.retention_days = retention_days  # 0 = keep forever
+
+    def path_for(self, user_id: int, session_id: int, captured_at: datetime, image_format: str) -> str:
+        shard = os.path.join(self.root, f"user_{user_id}", captured_at.strftime("%Y%m%d"))
+        return os.path.join(shard, f"session_{session_id}_{captured_at.strftime('%H%M%S%f')[:-3]}.{image_format}")
+
+    def save(self, user_id: int, session_id: int, captured_at: datetime, data: bytes, image_format: str) -> str:
+        """Write one image, catalog it and apply retention/quotas. Returns the path."""
+        path = self.path_for(user_id, session_id, captured_at, image_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+        db = SessionLocal()
+        try:
+            item = database.EvidenceItem(
+                session_id=session_id,
+                user_id=user_id,
+                captured_at=captured_at,
+                size_bytes=len(data),
+                path=path,
+                image_format=image_format,
+            )
+            db.add(item)
+            db.flush()
+
+            evicted = self._expired(db, database.EvidenceItem.user_id == user_id)
+            # The new image counts toward the quota but is never the one evicted
+            evicted += self._over_quota(db, database.EvidenceItem.session_id == session_id, self.session_quota_bytes, item.id)
+            evicted += self._over_quota(db, database.EvidenceItem.user_id == user_id, self.user_quota_bytes, item.id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            os.remove(path)
+            raise
+        finally:
+            db.close()
+
+        self._remove_files(evicted)
+        if evicted:
+            metrics.record("evidence", evicted=len(evicted))
+            print(f"🧹 Evidence Locker: Evicted {len(evicted)} item(s) for user {user_id}")
+        return path
+
+    def prune_expired(self) -> int:
+        """Delete every user's items older than the retention window. Returns the number pruned."""
+        pruned = 0
+        while True:
+            db = SessionLocal()
+            try:
+                expired = self._expired(db)
+                db.commit()
+            finally:
+                db.close()
+            self._remove_files(expired)
+            pruned += len(expired)
+            if len(expired) < EVICTION_BATCH:
+                break
+        if pruned:
+            metrics.record("evidence", expired=pruned)
+            print(f"🧹 Evidence Locker: Pruned {pruned} expired item(s)")
+        return pruned
+
+    @staticmethod
+    def _remove_files(items: List[Tuple[int, str]]):
+        # Files go only after the catalog rows are gone for good
+        for _, path in items:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _expired(self, db, *scope) -> List[Tuple[int, str]]:
+        if not self.retention_days:
+            return []
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        items = db.query(database.EvidenceItem.id, database.EvidenceItem.path).filter(
+            *scope,
+            database.EvidenceItem.captured_at < cutoff,
+        ).limit(EVICTION_BATCH).all()
+        return self._delete(db, items)
+
+    def _over_quota(self, db, scope, quota_bytes: int, keep_id: int) -> List[Tuple[int, str]]:
+        """Delete the oldest items in scope (except keep_id) until its total fits the quota."""
+        if not quota_bytes:
+            return []
+        total = db.query(func.coalesce(func.sum(database.EvidenceItem.size_bytes), 0)).filter(scope).scalar()
+        excess = total - quota_bytes
+        if excess <= 0:
+            return []
+
+        victims = []
+        oldest = db.query(database.EvidenceItem.id, database.EvidenceItem.path, database.EvidenceItem.size_bytes).filter(
+            scope, database.EvidenceItem.id != keep_id
+        ).order_by(database.EvidenceItem.captured_at, database.EvidenceItem.id).limit(EVICTION_BATCH)
+        for item_id, path, size_bytes in oldest:
+            victims.append((item_id, path))
+            excess -= size_bytes
+            if excess <= 0:
+                break
+        return self._delete(db, victims)
+
+    @staticmethod
+    def _delete(db, items) -> List[Tuple[int, str]]:
+        items = [(item_id, path) for item_id, path in items]
+        if items:
+            db.query(database.EvidenceItem).filter(
+                database.EvidenceItem.id.in_([item_id for item_id, _ in items])
+            ).delete(synchronize_session=False)
+        return items
+
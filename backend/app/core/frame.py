@@ -0,0 +1,182 @@
+"""
+Decoded camera frame shared across the analysis pipeline.
+Decode once, then hand the same pixels to detection and the evidence locker.
+
+JPEGs are decoded with libjpeg's scaled (DCT-domain) decode straight to the
+model's working size, and straight to RGB when the OpenCV build supports it,
+so the full-resolution BGR image is never materialized on the inference
+path. Consumers that need full resolution (the evidence locker) call
+Frame.full_resolution(), which decodes the kept JPEG bytes again.
+"""
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Union
+import base64
+
+from app.core.config import settings
+
+# Scaled-decode flags keyed by reduction factor
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# OpenCV >= 4.11 can emit RGB directly from the decoder
+_IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG's SOF header without decoding it."""
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers carry no length
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+
+    return None
+
+
+def reduction_factor(width: int, height: int, target_size: int) -> int:
+    """Largest libjpeg scale (1, 2, 4, 8) that keeps the long side >= target_size."""
+    if target_size <= 0:
+        return 1
+
+    long_side = max(width, height)
+    factor = 1
+    for candidate in (2, 4, 8):
+        if long_side // candidate >= target_size:
+            factor = candidate
+    return factor
+
+
+class Frame:
+    """
+    A decoded image with lazily computed (and cached) BGR and RGB views.
+    Whichever color order the decoder produced is stored; the other is only
+    converted if someone asks for it (e.g. the evidence locker wants BGR).
+    """
+
+    __slots__ = ("_bgr", "_rgb", "scale", "encoded")
+
+    def __init__(self, bgr: Optional[np.ndarray] = None, rgb: Optional[np.ndarray] = None, scale: int = 1,
+                 encoded: Optional[bytes] = None):
+        if bgr is None and rgb is None:
+            raise ValueError("Frame needs pixel data")
+        self._bgr = bgr
+        self._rgb = rgb
+        # Reduction factor applied at decode time (1 = full resolution)
+        self.scale = scale
+        # Source image bytes, kept only when the pixels are a reduced decode
+        self.encoded = encoded
+
+    def full_resolution(self) -> "Frame":
+        """
+        This frame at the source resolution. A reduced decode is decoded again
+        from the kept bytes (e.g. for evidence images, not the model input).
+        """
+        if self.scale == 1 or self.encoded is None:
+            return self
+        return Frame.from_bytes(self.encoded, target_size=0) or self
+
+    @property
+    def bgr(self) -> np.ndarray:
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self._rgb, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB view for MediaPipe, converted on first access only."""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return (self._rgb if self._rgb is not None else self._bgr).shape
+
+    @property
+    def width(self) -> int:
+        return self.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.shape[0]
+
+    @classmethod
+    def from_bytes(cls, img_bytes: bytes, target_size: Optional[int] = None) -> Optional["Frame"]:
+        """
+        Decode raw encoded image bytes (e.g. JPEG).
+        JPEGs larger than target_size (default: settings.frame_decode_target_size)
+        are decoded at 1/2, 1/4 or 1/8 scale; 0 disables scaled decode.
+        """
+        if target_size is None:
+            target_size = settings.frame_decode_target_size
+
+        scale = 1
+        size = jpeg_size(img_bytes)
+        if size:
+            scale = reduction_factor(size[0], size[1], target_size)
+
+        flags = _REDUCED_FLAGS[scale]
+        if _IMREAD_COLOR_RGB is not None:
+            # IMREAD_COLOR (also part of every REDUCED_COLOR flag) means BGR;
+            # OpenCV rejects it combined with IMREAD_COLOR_RGB
+            flags = (flags & ~cv2.IMREAD_COLOR) | _IMREAD_COLOR_RGB
+
+        try:
+            # Wrap the buffer without copying and decode image
+            nparr = np.frombuffer(img_bytes, np.uint8)
+            img = cv2.imdecode(nparr, flags)
+        except Exception as e:
+            print(f"Error decoding frame: {e}")
+            return None
+
+        if img is None:
+            return None
+        # Keep the encoded bytes of a reduced decode for full_resolution()
+        encoded = img_bytes if scale > 1 else None
+        if _IMREAD_COLOR_RGB is not None:
+            return cls(rgb=img, scale=scale, encoded=encoded)
+        return cls(bgr=img, scale=scale, encoded=encoded)
+
+    @classmethod
+    def from_base64(cls, base64_frame: str, target_size: Optional[int] = None) -> Optional["Frame"]:
+        """Decode a base64 string (data URL prefix allowed)."""
+        try:
+            # Remove data URL prefix if present
+            if ',' in base64_frame:
+                base64_frame = base64_frame.split(',')[1]
+
+            img_bytes = base64.b64decode(base64_frame)
+        except Exception as e:
+            print(f"Error decoding frame: {e}")
+            return None
+
+        return cls.from_bytes(img_bytes, target_size)
+
+    @classmethod
+    def decode(cls, data: Union[str, bytes], target_size: Optional[int] = None) -> Optional["Frame"]:
+        """Decode either a base64 string or raw image bytes."""
+        if isinstance(data, str):
+            return cls.from_base64(data, target_size)
+        return cls.from_bytes(data, target_size)
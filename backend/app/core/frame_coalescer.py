@@ -0,0 +1,117 @@
+"""
+Latest-frame-wins coalescing per session.
+When workers fall behind, posture_queue fills with frames nobody cares about
+any more: a live posture indicator only needs the newest one. Every frame
+gets a per-session sequence number when it is queued (one INCR); before a
+worker spends a decode and an inference on it, one script call checks that
+no newer frame of the session has been queued since, and that the frame is
+not older than frame_max_age_seconds. The same call updates the session's
+frame stats (processed, dropped counts, age at processing).
+
+Frame age uses wall-clock time stamped by the API, so API and worker clocks
+are assumed to be in sync (same host or NTP).
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+
+SUPERSEDED, STALE = "superseded", "stale"
+
+# Per-session stats expire a day after the session's last frame
+STATS_TTL_SECONDS = 24 * 3600
+
+ADMIT_LUA = """
+local latest = tonumber(redis.call('GET', KEYS[1]) or '0')
+local seq, age, max_age = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+
+local reason = ''
+if max_age > 0 and age > max_age then
+  reason = 'stale'
+elseif ARGV[5] == '1' and seq < latest then
+  reason = 'superseded'
+end
+
+if reason == '' then
+  redis.call('HINCRBY', KEYS[2], 'processed', 1)
+  redis.call('HINCRBYFLOAT', KEYS[2], 'age_ms_sum', age)
+  redis.call('HSET', KEYS[2], 'last_age_ms', age)
+  if age > tonumber(redis.call('HGET', KEYS[2], 'age_ms_max') or '0') then
+    redis.call('HSET', KEYS[2], 'age_ms_max', age)
+  end
+else
+  redis.call('HINCRBY', KEYS[2], 'dropped_' .. reason, 1)
+end
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]))
+return reason
+"""
+
+
+def _seq_key(session_id: int) -> str:
+    return f"session:{session_id}:frame_seq"
+
+
+def _stats_key(session_id: int) -> str:
+    return f"session:{session_id}:frame_stats"
+
+
+class FrameCoalescer:
+    """stamp() when a frame is queued, admit() before it is analyzed."""
+
+    def __init__(self, client, coalesce: bool, max_age_seconds: float):
+        self._client = client
+        self.coalesce = coalesce
+        self.max_age_seconds = max_age_seconds
+        self._admit = client.register_script(ADMIT_LUA)
+
+    def stamp(self, session_id: int) -> Tuple[int, float]:
+        """(sequence number, enqueue time) for a frame about to be queued."""
+        pipe = self._client.pipeline(transaction=False)
+        pipe.incr(_seq_key(session_id))
+        pipe.expire(_seq_key(session_id), STATS_TTL_SECONDS)
+        seq, _ = pipe.execute()
+        return seq, time.time()
+
+    def admit(self, frames: List[Tuple[int, int, float]]) -> List[Optional[str]]:
+        """
+        For each (session_id, seq, enqueued_at): None to analyze it, or the
+        drop reason (SUPERSEDED / STALE). One pipelined round-trip.
+        """
+        now = time.time()
+        pipe = self._client.pipeline(transaction=False)
+        for session_id, seq, enqueued_at in frames:
+            self._admit(keys=[_seq_key(session_id), _stats_key(session_id)], args=[
+                seq, round((now - enqueued_at) * 1000, 2), self.max_age_seconds * 1000, STATS_TTL_SECONDS,
+                "1" if self.coalesce else "0",
+            ], client=pipe)
+        return [reason or None for reason in pipe.execute()]
+
+    def stats(self, session_id: int) -> Dict[str, float]:
+        raw = self._client.hgetall(_stats_key(session_id))
+        values = {field: float(value) for field, value in raw.items()}
+        processed = values.get("processed", 0.0)
+        return {
+            "processed": int(processed),
+            "dropped_superseded": int(values.get("dropped_superseded", 0)),
+            "dropped_stale": int(values.get("dropped_stale", 0)),
+            "age_ms_avg": round(values.get("age_ms_sum", 0.0) / processed, 2) if processed else None,
+            "age_ms_max": values.get("age_ms_max"),
+            "last_age_ms": values.get("last_age_ms"),
+        }
+
+
+# Global instance (per process)
+_coalescer = None
+
+def get_frame_coalescer() -> FrameCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = FrameCoalescer(
+            redis.from_url(settings.redis_url, decode_responses=True),
+            coalesce=settings.frame_coalescing_enabled,
+            max_age_seconds=settings.frame_max_age_seconds,
+        )
+    return _coalescer
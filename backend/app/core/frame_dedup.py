@@ -0,0 +1,84 @@
+"""
+Near-duplicate frame detection with result reuse.
+A seated user produces long runs of almost identical frames; instead of
+running pose inference on each one, compare a tiny grayscale thumbnail with
+the last analyzed frame of the same session and reuse its result.
+
+State lives in the worker process (like the detector itself), bounded by
+an LRU over sessions.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.frame import Frame
+
+THUMB_SIZE = (32, 24)  # (width, height)
+
+
+class FrameDedupCache:
+    """Per-session fingerprint of the last analyzed frame plus its result."""
+
+    def __init__(self, threshold: float, max_age_seconds: float, max_sessions: int = 1024):
+        self.threshold = threshold
+        self.max_age_seconds = max_age_seconds
+        self.max_sessions = max_sessions
+        # session_id -> (thumbnail, result, analyzed_at)
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(frame: Frame) -> np.ndarray:
+        """Downscaled grayscale thumbnail (768 bytes)."""
+        thumb = cv2.resize(frame.rgb, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+
+    def lookup(self, session_id: int, fingerprint: np.ndarray) -> Optional[Dict]:
+        """Return the cached result if this frame is a near-duplicate that is still fresh."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+
+        thumb, result, analyzed_at = entry
+        if time.monotonic() - analyzed_at > self.max_age_seconds:
+            return None
+
+        # Mean absolute difference on a 0-255 scale
+        if float(cv2.absdiff(thumb, fingerprint).mean()) > self.threshold:
+            return None
+
+        with self._lock:
+            if session_id in self._entries:
+                self._entries.move_to_end(session_id)
+        return result
+
+    def store(self, session_id: int, fingerprint: np.ndarray, result: Dict):
+        with self._lock:
+            self._entries[session_id] = (fingerprint, result, time.monotonic())
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def forget(self, session_id: int):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+# Global instance (per worker process)
+_cache = None
+
+def get_frame_dedup() -> FrameDedupCache:
+    global _cache
+    if _cache is None:
+        _cache = FrameDedupCache(
+            threshold=settings.frame_dedup_threshold,
+            max_age_seconds=settings.frame_dedup_max_age_seconds,
+        )
+    return _cache
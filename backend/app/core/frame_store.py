@@ -0,0 +1,144 @@
+"""
+Short-lived blob store for frames in flight.
+Instead of pushing every JPEG through the Celery broker, the API puts the
+raw bytes here and the task message only carries a small reference. The
+worker takes (reads and deletes) the blob; anything never consumed expires
+after frame_blob_ttl_seconds.
+
+Backends (settings.frame_blob_store):
+    redis  binary key frame:{id} with a TTL (API and workers on any host)
+    shm    one file per frame under frame_blob_shm_dir, a tmpfs such as
+           /dev/shm (API and workers on the same host); stale files are
+           swept by the writer
+    none   no store, frames travel inside the task message as before
+"""
+
+import base64
+import os
+import time
+import uuid
+from typing import Optional, Union
+
+import redis
+
+from app.core.config import settings
+
+REDIS_PREFIX = "redis:"
+SHM_PREFIX = "shm:"
+
+
+class FrameExpired(Exception):
+    """The referenced frame expired (or was already taken) before a worker got to it."""
+
+
+def to_bytes(frame_data: Union[str, bytes]) -> bytes:
+    """Raw image bytes from a base64 string (data URL prefix allowed) or bytes."""
+    if isinstance(frame_data, bytes):
+        return frame_data
+    if ',' in frame_data:
+        frame_data = frame_data.split(',')[1]
+    return base64.b64decode(frame_data)
+
+
+def is_ref(frame_data) -> bool:
+    return isinstance(frame_data, str) and frame_data.startswith((REDIS_PREFIX, SHM_PREFIX))
+
+
+class FrameStore:
+    """put() on the API side, take() on the worker side."""
+
+    def __init__(self, backend: str, ttl_seconds: int, shm_dir: str):
+        if backend not in ("redis", "shm"):
+            raise ValueError(f"Unsupported frame blob store: {backend}")
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.shm_dir = shm_dir
+        self._redis = redis.from_url(settings.redis_url) if backend == "redis" else None
+        self._last_sweep = 0.0
+        if backend == "shm":
+            os.makedirs(shm_dir, exist_ok=True)
+
+    def put(self, data: bytes) -> str:
+        """Store a frame; returns the reference to put in the task message."""
+        blob_id = uuid.uuid4().hex
+        if self.backend == "redis":
+            self._redis.set(f"frame:{blob_id}", data, ex=self.ttl_seconds)
+            return REDIS_PREFIX + blob_id
+
+        path = os.path.join(self.shm_dir, blob_id)
+        # Write then rename, so a reader never sees a partial file
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        self._sweep()
+        return SHM_PREFIX + blob_id
+
+    def take(self, ref: str) -> Optional[bytes]:
+        """Read and delete a frame; None if it expired or was already taken."""
+        if ref.startswith(REDIS_PREFIX):
+            pipe = self._client().pipeline(transaction=True)
+            key = f"frame:{ref[len(REDIS_PREFIX):]}"
+            pipe.get(key)
+            pipe.delete(key)
+            data, _ = pipe.execute()
+            return data
+
+        path = os.path.join(self.shm_dir, ref[len(SHM_PREFIX):])
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def discard(self, ref: str):
+        """Delete a frame that will not be analyzed."""
+        if ref.startswith(REDIS_PREFIX):
+            self._client().delete(f"frame:{ref[len(REDIS_PREFIX):]}")
+            return
+        try:
+            os.remove(os.path.join(self.shm_dir, ref[len(SHM_PREFIX):]))
+        except FileNotFoundError:
+            pass
+
+    def _client(self):
+        # A worker may read Redis refs even when configured for shm (mixed deploys)
+        if self._redis is None:
+            self._redis = redis.from_url(settings.redis_url)
+        return self._redis
+
+    def _sweep(self):
+        """Delete shm blobs nobody consumed (at most once per second)."""
+        now = time.time()
+        if now - self._last_sweep < 1.0:
+            return
+        self._last_sweep = now
+        try:
+            entries = list(os.scandir(self.shm_dir))
+        except OSError as e:
+            print(f"Frame store sweep failed: {e}")
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.ttl_seconds:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # taken by a worker meanwhile
+
+
+# Global instance (per process)
+_store = None
+
+def get_frame_store() -> Optional[FrameStore]:
+    """The configured store, or None when frames travel inline."""
+    global _store
+    if settings.frame_blob_store == "none":
+        return None
+    if _store is None:
+        _store = FrameStore(
+            backend=settings.frame_blob_store,
+            ttl_seconds=settings.frame_blob_ttl_seconds,
+            shm_dir=settings.frame_blob_shm_dir,
+        )
+    return _store
@@ -0,0 +1,203 @@
+"""
+Write-behind buffer for PostureLog rows.
+Workers append rows to an in-memory buffer; a background thread writes them
+with one COPY per flush, either when posture_log_flush_rows have piled up or
+when the oldest buffered row is posture_log_flush_seconds old. That age is
+the loss window: a worker that dies without running its shutdown hook loses
+at most that much history (rows are never older than that when flushed,
+unless the database is down).
+
+While the database is unreachable rows are kept and retried, up to
+posture_log_max_buffer_rows; past that the oldest are dropped and counted.
+Rows the database rejects for good (an FK to a deleted session, a bad value)
+are isolated by bisecting the batch and dropped alone, so they cannot block
+everything behind them; a schema error (e.g. upgrade_columns() not run)
+drops the whole batch. Both are counted as rejected.
+"""
+
+import csv
+import io
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+import psycopg2
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import engine
+
+COLUMNS = (
+    "session_id", "timestamp", "posture_status", "neck_angle", "torso_angle",
+    "distance_score", "confidence", "model_tier", "classifier_version",
+)
+
+COPY_SQL = f"COPY posture_logs ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# Errors caused by the rows themselves: retrying the same rows cannot succeed
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+
+class _FlushInterrupted(Exception):
+    """A transient error stopped a flush; `pending` rows were not written."""
+
+    def __init__(self, cause: Exception, pending: list):
+        super().__init__(str(cause))
+        self.pending = pending
+
+
+class PostureLogWriter:
+    """Size/age triggered bulk writer (one per worker process)."""
+
+    def __init__(self, flush_rows: int, flush_seconds: float, max_buffer_rows: int):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.max_buffer_rows = max_buffer_rows
+
+        # (enqueued_at monotonic, row dict)
+        self._buffer: "deque" = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._last_flush = {}
+
+    def add(self, rows: List[Dict]):
+        """Buffer PostureLog column dicts (see posture_worker._log_row); never blocks on the DB."""
+        now = time.monotonic()
+        dropped = 0
+        with self._cond:
+            self._buffer.extend((now, row) for row in rows)
+            while len(self._buffer) > self.max_buffer_rows:
+                self._buffer.popleft()
+                dropped += 1
+            # Wakes the flusher for a full batch or to arm the age timer
+            self._cond.notify()
+        if dropped:
+            metrics.record("posture_log_writer", dropped=dropped)
+        self._ensure_thread()
+
+    def flush(self) -> int:
+        """Write everything buffered right now. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                written, rejected = self._write(batch)
+            except _FlushInterrupted as e:
+                # Keep the unwritten rows (oldest first) for the next attempt
+                with self._cond:
+                    self._buffer.extendleft(reversed(e.pending))
+                    overflow = len(self._buffer) - self.max_buffer_rows
+                    for _ in range(max(0, overflow)):
+                        self._buffer.popleft()
+                metrics.record("posture_log_writer", flush_errors=1, dropped=max(0, overflow))
+                metrics.set_gauges("posture_log_writer", backlog=self.backlog)
+                print(f"PostureLog flush failed ({len(e.pending)} rows buffered): {e}")
+                return 0
+
+            flush_ms = (time.perf_counter() - start) * 1000
+            age_ms = (time.monotonic() - batch[0][0]) * 1000
+            self._last_flush = {"rows": written, "flush_ms": round(flush_ms, 2), "oldest_row_age_ms": round(age_ms, 2)}
+            metrics.record("posture_log_writer", flushes=1, rows=written, rejected=rejected, flush_ms=flush_ms)
+            metrics.set_gauges("posture_log_writer", backlog=self.backlog, **{f"last_{k}": v for k, v in self._last_flush.items()})
+            # A fully rejected batch still counts as handled: the caller must not back off and retry it
+            return len(batch)
+
+    def _write(self, batch: list):
+        """
+        COPY (enqueued_at, row) pairs, isolating rows the database rejects.
+        Returns (written, rejected); raises _FlushInterrupted on any other error.
+        """
+        written = rejected = 0
+        # Stack of chunks, next chunk on top (keeps rows in order)
+        stack = [batch]
+        while stack:
+            chunk = stack.pop()
+            try:
+                self._copy([row for _, row in chunk])
+                written += len(chunk)
+            except ROW_ERRORS as e:
+                if len(chunk) == 1:
+                    rejected += 1
+                    print(f"PostureLog row rejected (session {chunk[0][1].get('session_id')}): {e}")
+                else:
+                    mid = len(chunk) // 2
+                    stack.append(chunk[mid:])
+                    stack.append(chunk[:mid])
+            except psycopg2.ProgrammingError as e:
+                # Statement-level (e.g. missing column): every row would fail the same way
+                rejected += len(chunk)
+                print(f"PostureLog rows rejected ({len(chunk)}): {e}")
+            except Exception as e:
+                pending = chunk + [pair for rest in reversed(stack) for pair in rest]
+                raise _FlushInterrupted(e, pending)
+        return written, rejected
+
+    @property
+    def backlog(self) -> int:
+        return len(self._buffer)
+
+    def _copy(self, rows: List[Dict]):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            # Unquoted empty field is NULL in COPY csv
+            writer.writerow(["" if row.get(col) is None else row[col] for col in COLUMNS])
+        buf.seek(0)
+
+        conn = engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.copy_expert(COPY_SQL, buf)
+            cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="posture-log-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Sleep until the batch is full or the oldest row reaches the age limit
+                while True:
+                    if len(self._buffer) >= self.flush_rows:
+                        break
+                    if self._buffer:
+                        remaining = self.flush_seconds - (time.monotonic() - self._buffer[0][0])
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+            if not self.flush() and self._buffer:
+                # Rows still buffered after a flush means the DB failed: back off before retrying
+                time.sleep(self.flush_seconds)
+
+
+# Global instance (per worker process)
+_writer = None
+
+def get_log_writer() -> PostureLogWriter:
+    global _writer
+    if _writer is None:
+        _writer = PostureLogWriter(
+            flush_rows=settings.posture_log_flush_rows,
+            flush_seconds=settings.posture_log_flush_seconds,
+            max_buffer_rows=settings.posture_log_max_buffer_rows,
+        )
+    return _writer
@@ -0,0 +1,75 @@
+"""
+Per-process memory accounting from /proc (Linux).
+RSS counts shared pages in full for every process, so it overstates what N
+prefork workers really use. USS (private pages) is what a process would free
+if it exited; PSS splits each shared page evenly among the processes mapping
+it, so the PSS of all workers adds up to their real footprint.
+
+Run as a script to list every Celery process on this host:
+    python -m app.core.memory_report
+"""
+
+import os
+from typing import Dict, List, Optional
+
+KB = 1024
+
+
+def process_memory(pid: str = "self") -> Optional[Dict[str, float]]:
+    """rss / pss / uss / shared in MB from /proc/<pid>/smaps_rollup, None if unavailable."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except (OSError, ValueError):
+        return None
+
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / KB, 1),
+        "pss_mb": round(fields.get("Pss", 0) / KB, 1),
+        "uss_mb": round(private / KB, 1),
+        "shared_mb": round(shared / KB, 1),
+    }
+
+
+def celery_processes() -> List[Dict]:
+    """Memory of every process on this host whose command line mentions celery."""
+    processes = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+        except OSError:
+            continue
+        if "celery" not in cmdline or "memory_report" in cmdline:
+            continue
+        memory = process_memory(pid)
+        if memory:
+            processes.append({"pid": int(pid), "cmdline": cmdline, **memory})
+    return sorted(processes, key=lambda p: p["pid"])
+
+
+def main():
+    processes = celery_processes()
+    if not processes:
+        print("No celery processes found (or /proc/<pid>/smaps_rollup not readable)")
+        return
+
+    print(f"\n{'='*72}")
+    print("Celery worker memory (MB)")
+    print(f"{'='*72}")
+    print(f"{'pid':>8}{'rss':>10}{'pss':>10}{'uss':>10}{'shared':>10}  command")
+    for p in processes:
+        print(f"{p['pid']:>8}{p['rss_mb']:>10.1f}{p['pss_mb']:>10.1f}{p['uss_mb']:>10.1f}{p['shared_mb']:>10.1f}  {p['cmdline'][:40]}")
+    print(f"{'total':>8}{sum(p['rss_mb'] for p in processes):>10.1f}"
+          f"{sum(p['pss_mb'] for p in processes):>10.1f}{sum(p['uss_mb'] for p in processes):>10.1f}")
+    print("\nPSS total is the real footprint; RSS total double-counts shared pages.")
+
+
+if __name__ == "__main__":
+    main()
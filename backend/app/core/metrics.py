@@ -0,0 +1,55 @@
+"""
+Lightweight pipeline metrics shared through Redis hashes.
+Workers (any process) bump counters; the API reads them back at GET /api/v1/metrics.
+Metric writes never raise: losing a sample is better than failing a frame.
+"""
+
+import redis
+from typing import Dict
+
+from app.core.config import settings
+
+METRICS_PREFIX = "metrics:"
+
+_r = redis.from_url(settings.redis_url, decode_responses=True)
+
+
+def record(group: str, **counters: float):
+    """Increment several counters of one metric group in a single round-trip."""
+    try:
+        key = METRICS_PREFIX + group
+        pipe = _r.pipeline(transaction=False)
+        for field, amount in counters.items():
+            if isinstance(amount, int):
+                pipe.hincrby(key, field, amount)
+            else:
+                pipe.hincrbyfloat(key, field, amount)
+        pipe.execute()
+    except Exception as e:
+        print(f"Metrics error ({group}): {e}")
+
+
+def set_gauges(group: str, **gauges):
+    """Overwrite point-in-time values (last value wins)."""
+    try:
+        _r.hset(METRICS_PREFIX + group, mapping=gauges)
+    except Exception as e:
+        print(f"Metrics error ({group}): {e}")
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """Read every metric group."""
+    groups = {}
+    for key in _r.scan_iter(match=METRICS_PREFIX + "*", count=100):
+        values = {}
+        for field, value in _r.hgetall(key).items():
+            try:
+                values[field] = float(value)
+            except ValueError:
+                values[field] = value
+        # Derived ratio for hit/miss style groups
+        if "hits" in values and "misses" in values:
+            total = values["hits"] + values["misses"]
+            values["hit_rate"] = round(values["hits"] / total, 4) if total else 0.0
+        groups[key[len(METRICS_PREFIX):]] = values
+    return groups
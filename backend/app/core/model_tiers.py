@@ -0,0 +1,102 @@
+"""
+Load-adaptive model tier selection.
+The pose landmarker ships in three sizes (lite < full < heavy). Under load
+we degrade to a cheaper tier; when the queue drains we climb back to the
+most accurate one. Decisions use the measured posture_queue depth and a
+per-tier latency moving average against a per-frame budget.
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+import redis
+
+from app.core import metrics
+from app.core.config import settings
+
+# Ordered cheapest -> most accurate
+MODEL_TIERS = ("lite", "full", "heavy")
+
+POSTURE_QUEUE = "posture_queue"
+
+
+class TierSelector:
+    """Picks the model tier for the next frame, with hysteresis."""
+
+    def __init__(self, available: List[str]):
+        # Keep canonical order, only tiers whose model file exists
+        self.tiers = [t for t in MODEL_TIERS if t in available]
+        default = settings.detector_default_tier
+        self._index = self.tiers.index(default) if default in self.tiers else len(self.tiers) - 1
+        self._latency_ms: Dict[str, float] = {}
+        self._queue_depth = 0
+        self._last_sample = 0.0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._redis = redis.from_url(settings.redis_url)
+
+    @property
+    def current(self) -> str:
+        return self.tiers[self._index]
+
+    def select(self) -> str:
+        """Tier for the next frame."""
+        if not settings.detector_adaptive_tiers or len(self.tiers) < 2:
+            return self.current
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sample >= 1.0:
+                self._last_sample = now
+                self._sample_queue_depth()
+                metrics.set_gauges("model_tier", **self.stats())
+
+            if now - self._last_change >= settings.detector_tier_cooldown_seconds:
+                step = self._decide()
+                if step:
+                    self._index += step
+                    self._last_change = now
+                    print(f"⚙️ Model tier -> {self.current} (queue depth {self._queue_depth})")
+
+            return self.current
+
+    def observe(self, tier: str, latency_ms: float):
+        """Feed back the measured inference latency of a frame."""
+        with self._lock:
+            avg = self._latency_ms.get(tier)
+            self._latency_ms[tier] = latency_ms if avg is None else 0.8 * avg + 0.2 * latency_ms
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.current,
+            "queue_depth": self._queue_depth,
+            **{f"latency_ms_{t}": round(v, 2) for t, v in self._latency_ms.items()},
+        }
+
+    def _sample_queue_depth(self):
+        try:
+            self._queue_depth = self._redis.llen(POSTURE_QUEUE)
+        except Exception as e:
+            print(f"Queue depth sample failed: {e}")
+
+    def _decide(self) -> int:
+        """-1 to degrade, +1 to upgrade, 0 to hold."""
+        budget = settings.detector_latency_budget_ms
+        latency = self._latency_ms.get(self.current)
+
+        # Over budget only matters once frames are actually waiting
+        over_budget = latency is not None and latency > budget
+        overloaded = (self._queue_depth > settings.detector_queue_high_watermark
+                      or (over_budget and self._queue_depth > settings.detector_queue_low_watermark))
+        if overloaded and self._index > 0:
+            return -1
+
+        if self._index < len(self.tiers) - 1 and self._queue_depth <= settings.detector_queue_low_watermark:
+            # Idle: always climb back. Lightly loaded: only if the next tier
+            # is known (or assumed) to fit the budget.
+            next_latency = self._latency_ms.get(self.tiers[self._index + 1])
+            if self._queue_depth == 0 or next_latency is None or next_latency <= budget:
+                return 1
+
+        return 0
@@ -3,89 +3,195 @@ MediaPipe-based posture detection module.
 Analyzes pose landmarks to determine posture quality using Tasks API.
 """
 
-import cv2
 import numpy as np
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
-from typing import Optional, Dict, Tuple
-import base64
+from typing import Optional, Dict, Tuple, Union
+from collections import namedtuple
+from contextlib import contextmanager
 import os
+import queue
+import threading
+import time
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.detector_manager import SessionLandmarkers, RoiTracker
+from app.core.frame import Frame
+from app.core.model_tiers import MODEL_TIERS, TierSelector
+from app.core import posture_geometry as geometry
+
+
+# Landmarks the classifier and skeleton overlay need: nose, ears, shoulders, hips
+REQUIRED_LANDMARKS = (0, 7, 8, 11, 12, 23, 24)
+
+# Minimal landmark point (duck-types MediaPipe's NormalizedLandmark)
+Landmark = namedtuple("Landmark", ["x", "y", "presence"])
+
+MODELS_DIR = settings.models_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+def find_model_paths() -> Dict[str, str]:
+    """tier -> model file, for the tiers whose .task file exists."""
+    paths = {}
+    for tier in MODEL_TIERS:
+        model_path = os.path.join(MODELS_DIR, f'pose_landmarker_{tier}.task')
+        if os.path.exists(model_path):
+            paths[tier] = model_path
+    return paths
 
 
 class PostureDetector:
     """Detects and analyzes posture from camera frames using MediaPipe Tasks API."""
     
-    def __init__(self):
-        # Path to the pre-trained model
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        model_path = os.path.join(current_dir, 'models', 'pose_landmarker_heavy.task')
-        
-        if not os.path.exists(model_path):
-            print(f"✗ MediaPipe model file not found at {model_path}")
-            # Try to download if missing (already done in setup but for robustness)
+    def __init__(self, load_model: bool = True, share_from: Optional["PostureDetector"] = None):
+        """
+        share_from: another instance whose per-session state (VIDEO landmarkers,
+        ROI boxes, tier selector) this one should share. Used by DetectorPool so
+        pooled instances only duplicate the IMAGE-mode landmarkers.
+        """
+        self.sessions = None
+        self.roi = None
+        self.tiers = None
+        self.landmarkers = {}
+        self._owns_sessions = share_from is None
+        if not load_model:
+            # Classification-only instance (client-side pose estimation)
+            self.detector = None
+            return
+        
+        # Paths to the pre-trained models (lite / full / heavy, whichever are present)
+        self.model_paths = find_model_paths()
+        
+        if not self.model_paths:
+            print(f"✗ MediaPipe model files not found in {MODELS_DIR} (run download_models.py)")
             self.detector = None
             return
 
-        base_options = python.BaseOptions(model_asset_path=model_path)
+        if share_from is not None:
+            self.tiers = share_from.tiers
+            self.roi = share_from.roi
+            self.sessions = share_from.sessions
+            self.detector = self._image_landmarker(self.tiers.current)
+            return
+        
+        self.tiers = TierSelector(list(self.model_paths))
+        if settings.detector_adaptive_tiers and len(self.model_paths) < len(MODEL_TIERS):
+            missing = [tier for tier in MODEL_TIERS if tier not in self.model_paths]
+            print(f"⚠️  Model tiers {missing} not found in {MODELS_DIR}; adaptive tiers limited to "
+                  f"{list(self.model_paths)} (run download_models.py)")
+        self.detector = self._image_landmarker(self.tiers.current)
+        
+        # ROI mode: crop around the last known body box, IMAGE-mode inference.
+        # Takes precedence over VIDEO mode (a moving crop would confuse the tracker).
+        if settings.detector_roi_mode:
+            self.roi = RoiTracker(padding=settings.detector_roi_padding)
+        
+        # Per-session VIDEO-mode landmarkers (tracking skips re-detection)
+        elif settings.detector_video_mode:
+            self.sessions = SessionLandmarkers(
+                factory=lambda tier: self._create_landmarker(vision.RunningMode.VIDEO, tier),
+                max_sessions=settings.detector_max_sessions,
+                idle_timeout_seconds=settings.detector_session_idle_seconds,
+            )
+    
+    def _create_landmarker(self, running_mode, tier: str):
+        # A path, not model_asset_buffer: MediaPipe memory-maps the file, so its
+        # pages stay shared through the page cache; a buffer is copied per process
+        base_options = python.BaseOptions(model_asset_path=self.model_paths[tier])
         options = vision.PoseLandmarkerOptions(
             base_options=base_options,
-            running_mode=vision.RunningMode.IMAGE,
+            running_mode=running_mode,
             num_poses=1,
             min_pose_detection_confidence=0.5,
             min_pose_presence_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.detector = vision.PoseLandmarker.create_from_options(options)
+        return vision.PoseLandmarker.create_from_options(options)
+    
+    def _image_landmarker(self, tier: str):
+        """IMAGE-mode landmarker for a tier, created on first use."""
+        if tier not in self.landmarkers:
+            self.landmarkers[tier] = self._create_landmarker(vision.RunningMode.IMAGE, tier)
+        return self.landmarkers[tier]
         
+    def warm_up(self, runs: int = 2) -> Dict[str, float]:
+        """
+        Create the IMAGE landmarkers up front and push a blank frame through
+        each, so the first real frame does not pay for model load and graph
+        setup. Warms only the active tier; other tiers are built on first use
+        unless detector_warmup_all_tiers (with adaptive tiers) asks for all
+        of them, trading resident memory for a stall-free first tier switch.
+        Returns warm-up time (ms) per tier.
+        """
+        if self.detector is None:
+            return {}
+        
+        warm_all = settings.detector_adaptive_tiers and settings.detector_warmup_all_tiers
+        tiers = self.tiers.tiers if warm_all else [self.tiers.current]
+        blank = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.zeros((240, 320, 3), dtype=np.uint8))
+        timings = {}
+        for tier in tiers:
+            start = time.perf_counter()
+            landmarker = self._image_landmarker(tier)
+            for _ in range(runs):
+                landmarker.detect(blank)
+            timings[tier] = (time.perf_counter() - start) * 1000
+        return timings
+    
     def decode_frame(self, base64_frame: str) -> Optional[np.ndarray]:
-        """Decode base64 image to numpy array."""
-        try:
-            # Remove data URL prefix if present
-            if ',' in base64_frame:
-                base64_frame = base64_frame.split(',')[1]
-            
-            # Decode base64 to bytes
-            img_bytes = base64.b64decode(base64_frame)
-            
-            # Convert to numpy array
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            
-            # Decode image
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            return img
-        except Exception as e:
-            print(f"Error decoding frame: {e}")
-            return None
+        """Decode base64 image to numpy array (full resolution, BGR)."""
+        frame = Frame.from_base64(base64_frame, target_size=0)
+        return frame.bgr if frame is not None else None
+    
+    def decode_frame_bytes(self, img_bytes: bytes) -> Optional[np.ndarray]:
+        """Decode raw encoded image bytes (e.g. JPEG) to numpy array (full resolution, BGR)."""
+        frame = Frame.from_bytes(img_bytes, target_size=0)
+        return frame.bgr if frame is not None else None
     
     def calculate_angle(self, a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> float:
         """Calculate angle between three points."""
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
+        return float(geometry.angle_between(np.asarray(a), np.asarray(b), np.asarray(c)))
     
     def analyze_posture(self, frame_base64: str) -> Dict:
         """
         Analyze posture from a base64-encoded frame.
         """
         if self.detector is None:
-            return {
-                'posture_status': 'ERROR',
-                'confidence': 0.0,
-                'error': 'MediaPipe detector not initialized'
-            }
+            return self._not_initialized()
+
+        return self.analyze_frame(Frame.from_base64(frame_base64))
+    
+    def analyze_posture_bytes(self, frame_bytes: bytes) -> Dict:
+        """
+        Analyze posture from raw encoded image bytes (no base64 round-trip).
+        """
+        if self.detector is None:
+            return self._not_initialized()
+
+        return self.analyze_frame(Frame.from_bytes(frame_bytes))
+    
+    def _not_initialized(self) -> Dict:
+        return {
+            'posture_status': 'ERROR',
+            'confidence': 0.0,
+            'error': 'MediaPipe detector not initialized'
+        }
+    
+    def analyze_frame(self, frame: Union[Frame, np.ndarray, None], session_id: Optional[int] = None) -> Dict:
+        """
+        Analyze posture from an already-decoded image.
+        Accepts a Frame (its cached RGB view is reused) or a BGR ndarray.
+        With a session_id, ROI mode crops to the session's last body box and
+        video mode uses the session's VIDEO-mode landmarker, so consecutive
+        frames are tracked rather than re-detected from scratch.
+        """
+        if self.detector is None:
+            return self._not_initialized()
+
+        if isinstance(frame, np.ndarray):
+            frame = Frame(frame)
 
-        # Decode frame
-        frame = self.decode_frame(frame_base64)
         if frame is None:
             return {
                 'posture_status': 'NO_PERSON',
@@ -93,126 +199,251 @@ class PostureDetector:
                 'error': 'Failed to decode frame'
             }
         
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Pick the model tier for this frame (degrades under load)
+        tier = self.tiers.select()
+        landmarker = self._image_landmarker(tier)
+        start = time.perf_counter()
         
-        # Convert to MediaPipe Image object
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        landmarks = None
+        if session_id is not None and self.roi is not None:
+            landmarks = self._detect_roi(frame, session_id, landmarker)
+            if landmarks is not None:
+                metrics.record("roi", hits=1)
+            else:
+                metrics.record("roi", misses=1)
+        
+        if landmarks is None:
+            # Full-frame pass
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame.rgb)
+            
+            # Process with MediaPipe Landmarker
+            if session_id is not None and self.sessions is not None:
+                detection_result = self.sessions.detect(session_id, mp_image, tier)
+            else:
+                detection_result = landmarker.detect(mp_image)
+            
+            if detection_result.pose_landmarks:
+                landmarks = detection_result.pose_landmarks[0]
         
-        # Process with MediaPipe Landmarker
-        detection_result = self.detector.detect(mp_image)
+        self.tiers.observe(tier, (time.perf_counter() - start) * 1000)
+        metrics.record("model_tier", **{f"frames_{tier}": 1})
         
-        if not detection_result.pose_landmarks:
+        if landmarks is None:
+            if self.roi is not None and session_id is not None:
+                self.roi.forget(session_id)
             return {
                 'posture_status': 'NO_PERSON',
                 'confidence': 0.0,
-                'message': 'No person detected in frame'
+                'message': 'No person detected in frame',
+                'model_tier': tier
             }
         
-        # Get the first pose detected
-        landmarks = detection_result.pose_landmarks[0]
-        
-        # Landmark indices (legacy mapping still applies)
-        # 0: nose, 11: left_shoulder, 12: right_shoulder, 23: left_hip, 24: right_hip, 7: left_ear
-        
-        # Extract coordinates
-        # Nose
-        nose = (landmarks[0].x, landmarks[0].y)
-        
-        # Shoulders
-        left_shoulder = (landmarks[11].x, landmarks[11].y)
-        right_shoulder = (landmarks[12].x, landmarks[12].y)
-        
-        # Hips
-        left_hip = (landmarks[23].x, landmarks[23].y)
-        right_hip = (landmarks[24].x, landmarks[24].y)
-        
-        # Ears (for head tilt)
-        left_ear = (landmarks[7].x, landmarks[7].y)
+        if self.roi is not None and session_id is not None:
+            self.roi.update(session_id, [landmarks[idx] for idx in REQUIRED_LANDMARKS])
         
-        # Calculate midpoints
-        shoulder_mid = ((left_shoulder[0] + right_shoulder[0]) / 2,
-                       (left_shoulder[1] + right_shoulder[1]) / 2)
-        hip_mid = ((left_hip[0] + right_hip[0]) / 2,
-                  (left_hip[1] + right_hip[1]) / 2)
+        # Get the first pose detected
+        result = self.analyze_landmarks(landmarks)
+        result['model_tier'] = tier
+        return result
+    
+    def _detect_roi(self, frame: Frame, session_id: int, landmarker):
+        """
+        Run inference on a crop around the session's last body box and map the
+        landmarks back to full-frame normalized coordinates.
+        Returns None (caller falls back to a full-frame pass) when there is no
+        box yet, nothing is found, confidence drops, or a landmark touches a
+        crop edge that is not also a frame edge.
+        """
+        width, height = frame.width, frame.height
+        box = self.roi.crop_box(session_id, width, height)
+        if box is None:
+            return None
         
-        # Calculate angles
-        # Neck angle: ear -> shoulder -> hip (should be close to 180° for good posture)
-        neck_angle = self.calculate_angle(left_ear, shoulder_mid, hip_mid)
+        x0, y0, x1, y1 = box
+        crop = np.ascontiguousarray(frame.rgb[y0:y1, x0:x1])
+        result = landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=crop))
+        if not result.pose_landmarks:
+            return None
         
-        # Torso angle: shoulder -> hip -> vertical reference
-        vertical_ref = (hip_mid[0], hip_mid[1] + 0.2)
-        torso_angle = self.calculate_angle(shoulder_mid, hip_mid, vertical_ref)
+        crop_landmarks = result.pose_landmarks[0]
+        required = [crop_landmarks[idx] for idx in REQUIRED_LANDMARKS]
+        if np.mean([lm.presence for lm in required]) < settings.detector_roi_min_presence:
+            return None
         
-        # Estimate distance from camera (using shoulder width as reference)
-        shoulder_width = abs(left_shoulder[0] - right_shoulder[0])
-        distance_score = shoulder_width / 0.20  # 1.0 is ideal
+        margin = settings.detector_roi_border_margin
+        for lm in required:
+            if ((x0 > 0 and lm.x < margin) or (x1 < width and lm.x > 1 - margin) or
+                    (y0 > 0 and lm.y < margin) or (y1 < height and lm.y > 1 - margin)):
+                return None
         
-        # Get average confidence
-        confidence = np.mean([lm.presence for lm in landmarks])
+        crop_w, crop_h = x1 - x0, y1 - y0
+        return [
+            Landmark((lm.x * crop_w + x0) / width, (lm.y * crop_h + y0) / height, lm.presence)
+            for lm in crop_landmarks
+        ]
+    
+    def analyze_landmarks(self, landmarks) -> Dict:
+        """
+        Classify posture from normalized pose landmarks (no image, no model).
+        `landmarks` is a (33, 3) array of (x, y, presence), or anything
+        indexable by MediaPipe landmark index (the full list of 33, or a
+        mapping holding at least REQUIRED_LANDMARKS) whose points expose
+        `.x`, `.y` and `.presence`.
+        Thin single-pose wrapper around app.core.posture_geometry.
+        """
+        if isinstance(landmarks, np.ndarray):
+            arr = landmarks
+        else:
+            arr = geometry.landmarks_to_array(landmarks)
         
-        # Determine posture status
-        posture_status = self._classify_posture(neck_angle, torso_angle, distance_score)
+        version = settings.classifier_version
+        measured = geometry.analyze(arr[np.newaxis], geometry.thresholds_for(version))
         
         # Extract landmarks for skeleton visualization (normalized coordinates)
         # We only need a subset for the basic skeleton
         skeleton_landmarks = {}
-        relevant_indices = [0, 7, 8, 11, 12, 23, 24] # nose, ears, shoulders, hips
-        for idx in relevant_indices:
+        for idx in REQUIRED_LANDMARKS:
+            x, y, presence = arr[idx]
             skeleton_landmarks[str(idx)] = {
-                'x': float(landmarks[idx].x),
-                'y': float(landmarks[idx].y),
-                'presence': float(landmarks[idx].presence)
+                'x': float(x),
+                'y': float(y),
+                'presence': float(presence)
             }
         
         return {
-            'posture_status': posture_status,
-            'neck_angle': float(180 - neck_angle),
-            'torso_angle': float(abs(90 - torso_angle)),
-            'distance_score': float(distance_score),
-            'confidence': float(confidence),
-            'shoulder_width': float(shoulder_width),
-            'landmarks': skeleton_landmarks
+            'posture_status': str(measured['posture_status'][0]),
+            'neck_angle': float(measured['neck_angle'][0]),
+            'torso_angle': float(measured['torso_angle'][0]),
+            'distance_score': float(measured['distance_score'][0]),
+            'confidence': float(measured['confidence'][0]),
+            'shoulder_width': float(measured['shoulder_width'][0]),
+            'landmarks': skeleton_landmarks,
+            'classifier_version': version
         }
     
     def _classify_posture(self, neck_angle: float, torso_angle: float, distance_score: float) -> str:
-        """Classify posture based on angles and distance."""
-        # Check distance first
-        if distance_score > 1.4:
-            return 'TOO_CLOSE'
-        
-        # READING MODE LOGIC:
-        # If the neck is very straight (high angle), we allow more forward lean (lower torso angle).
-        # This accounts for "leaning in" to read without rounding the back.
-        
-        if neck_angle > 165:
-            # Good neck alignment -> allow forward lean down to 60 degrees
-            min_torso_angle = 60
-        else:
-            # Curved neck -> stricter torso requirement
-            min_torso_angle = 70
-            
-        if torso_angle < min_torso_angle:
-            return 'SLOUCHING'
-            
-        # Strict neck angle check (always slouching if neck is bent)
-        if neck_angle < 155:
-            return 'SLOUCHING'
-        
-        return 'GOOD'
+        """Classify posture based on angles and distance (see posture_geometry.classify)."""
+        status = geometry.classify(np.atleast_1d(neck_angle), np.atleast_1d(torso_angle), np.atleast_1d(distance_score),
+                                   geometry.thresholds_for(settings.classifier_version))
+        return str(status[0])
+    
+    def release_session(self, session_id: int):
+        """Drop per-session state (VIDEO landmarker, ROI box) of a stopped session."""
+        if self.sessions is not None:
+            self.sessions.release(session_id)
+        if self.roi is not None:
+            self.roi.forget(session_id)
     
     def __del__(self):
         """Cleanup detector."""
-        if hasattr(self, 'detector') and self.detector:
-            self.detector.close()
+        if getattr(self, 'sessions', None) and self._owns_sessions:
+            self.sessions.close_all()
+        for landmarker in getattr(self, 'landmarkers', {}).values():
+            landmarker.close()
+
 
+class DetectorPool:
+    """
+    Bounded pool of PostureDetector instances with checkout/checkin semantics.
+    PoseLandmarker.detect is not safe to call concurrently, so each thread
+    (Celery `threads` pool, API threadpool) checks out its own instance.
+    Instances are created lazily up to `size` and share per-session state.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()  # LIFO keeps recently used instances hot
+        self._created = []
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> PostureDetector:
+        """First instance (created on demand); owns the shared session state."""
+        with self._lock:
+            if not self._created:
+                self._created.append(PostureDetector())
+                self._idle.put(self._created[0])
+            return self._created[0]
+
+    def warm_up(self) -> Dict[str, float]:
+        """Create all `size` instances now and warm each one (see PostureDetector.warm_up)."""
+        primary = self.primary
+        with self._lock:
+            while len(self._created) < self.size:
+                detector = PostureDetector(share_from=primary)
+                self._created.append(detector)
+                self._idle.put(detector)
+            created = list(self._created)
+        
+        timings = {}
+        for detector in created:
+            for tier, ms in detector.warm_up().items():
+                timings[tier] = timings.get(tier, 0.0) + ms
+        return timings
+
+    def release_session(self, session_id: int):
+        """Drop a stopped session's shared state (no-op before the first detector exists)."""
+        with self._lock:
+            primary = self._created[0] if self._created else None
+        if primary is not None:
+            primary.release_session(session_id)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Borrow a detector for the duration of the with-block."""
+        detector = self._acquire(timeout)
+        try:
+            yield detector
+        finally:
+            self._idle.put(detector)
+
+    def _acquire(self, timeout: Optional[float]) -> PostureDetector:
+        primary = self.primary
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._created) < self.size:
+                detector = PostureDetector(share_from=primary)
+                self._created.append(detector)
+                return detector
+
+        # Pool exhausted: wait for a checkin
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No detector available within {timeout}s (pool size {self.size})")
+
+
+# Global instances
+_pool = None
+_pool_lock = threading.Lock()
+_classifier = None
+
+def get_detector_pool() -> DetectorPool:
+    """Get or create the process-wide DetectorPool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DetectorPool(settings.detector_pool_size)
+    return _pool
 
-# Global instance
-_detector = None
 
 def get_detector() -> PostureDetector:
-    """Get or create global PostureDetector instance."""
-    global _detector
-    if _detector is None:
-        _detector = PostureDetector()
-    return _detector
+    """
+    Get the process-wide primary PostureDetector.
+    Only safe for single-threaded callers; concurrent callers must use
+    get_detector_pool().checkout().
+    """
+    return get_detector_pool().primary
+
+
+def get_classifier() -> PostureDetector:
+    """Get a PostureDetector for landmark-only classification (never loads the model)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = PostureDetector(load_model=False)
+    return _classifier
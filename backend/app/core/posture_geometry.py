@@ -0,0 +1,166 @@
+"""
+Vectorized posture geometry and classification.
+Works on landmark arrays of shape (N, 33, 3) float32 with channels
+(x, y, presence) in MediaPipe's normalized coordinates, so a batch of N
+poses is measured and classified in one NumPy pass. The single-frame
+detector path is a thin wrapper around the same functions.
+
+Landmarks that were not supplied (e.g. a client sending only the subset
+the classifier needs) are NaN and ignored by the confidence average.
+"""
+
+from collections import namedtuple
+from typing import Dict
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# Channel layout of the last axis
+X, Y, PRESENCE = 0, 1, 2
+
+# MediaPipe landmark indices used by the classifier
+NOSE, LEFT_EAR, RIGHT_EAR = 0, 7, 8
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+# Classification thresholds (angles in degrees, raw geometry before reporting transforms)
+Thresholds = namedtuple("Thresholds", [
+    "too_close_distance",    # distance_score above this -> TOO_CLOSE
+    "straight_neck",         # neck angle above this counts as "reading mode"
+    "min_torso_reading",     # min torso angle when the neck is straight
+    "min_torso",             # min torso angle otherwise
+    "min_neck",              # neck angle below this is always SLOUCHING
+])
+
+DEFAULT_THRESHOLDS = Thresholds(
+    too_close_distance=1.4,
+    straight_neck=165.0,
+    min_torso_reading=60.0,
+    min_torso=70.0,
+    min_neck=155.0,
+)
+
+# Versioned threshold sets. Never edit a published version: add a new one,
+# point settings.classifier_version at it and run the re-classification job
+# (reclassify_logs.py) so historical PostureLog rows stay consistent.
+CLASSIFIER_VERSIONS = {
+    1: DEFAULT_THRESHOLDS,
+}
+
+# Shoulder width (normalized) at the ideal camera distance
+IDEAL_SHOULDER_WIDTH = 0.20
+
+
+def thresholds_for(version: int) -> Thresholds:
+    """Threshold set for a classifier version (KeyError if unknown)."""
+    return CLASSIFIER_VERSIONS[version]
+
+
+def raw_angles_from_reported(neck_angle: np.ndarray, torso_angle: np.ndarray):
+    """
+    Invert the reporting transforms applied before storage.
+    neck: reported = 180 - raw, exact.
+    torso: reported = |90 - raw| loses the side of 90; raw < 90 would mean the
+    shoulders sit below hip level, which cannot happen for a seated user, so
+    raw = 90 + reported.
+    """
+    return 180 - neck_angle, 90 + torso_angle
+
+
+def empty_landmarks(n: int = 1) -> np.ndarray:
+    """(n, 33, 3) array filled with NaN (landmark not supplied)."""
+    return np.full((n, NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """
+    Pack one pose into a (33, 3) array.
+    Accepts MediaPipe's landmark list or a mapping of index -> point; points
+    expose .x, .y and .presence.
+    """
+    arr = empty_landmarks(1)[0]
+    items = landmarks.items() if isinstance(landmarks, dict) else enumerate(landmarks)
+    for idx, lm in items:
+        arr[idx] = (lm.x, lm.y, lm.presence)
+    return arr
+
+
+def angle_between(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Angle ABC in degrees (0-180) for (..., 2) point arrays.
+    Vectorized form of the original PostureDetector.calculate_angle.
+    """
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angle = np.abs(np.degrees(radians))
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+
+def measure(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Raw geometry for (N, 33, 3) landmarks; every value has shape (N,).
+    neck_angle: ear -> shoulder mid -> hip mid (~180 is upright)
+    torso_angle: shoulder mid -> hip mid -> vertical reference (~180 is upright)
+    """
+    xy = landmarks[..., :2]
+    shoulder_mid = (xy[:, LEFT_SHOULDER] + xy[:, RIGHT_SHOULDER]) / 2
+    hip_mid = (xy[:, LEFT_HIP] + xy[:, RIGHT_HIP]) / 2
+
+    neck_angle = angle_between(xy[:, LEFT_EAR], shoulder_mid, hip_mid)
+
+    vertical_ref = hip_mid.copy()
+    vertical_ref[:, 1] += 0.2
+    torso_angle = angle_between(shoulder_mid, hip_mid, vertical_ref)
+
+    shoulder_width = np.abs(xy[:, LEFT_SHOULDER, 0] - xy[:, RIGHT_SHOULDER, 0])
+
+    # Mean presence over the landmarks that were supplied
+    presence = landmarks[..., PRESENCE]
+    supplied = ~np.isnan(presence)
+    confidence = np.where(supplied, presence, 0).sum(axis=1) / np.maximum(supplied.sum(axis=1), 1)
+
+    return {
+        "neck_angle": neck_angle,
+        "torso_angle": torso_angle,
+        "distance_score": shoulder_width / IDEAL_SHOULDER_WIDTH,  # 1.0 is ideal
+        "shoulder_width": shoulder_width,
+        "confidence": confidence,
+    }
+
+
+def classify(neck_angle: np.ndarray, torso_angle: np.ndarray, distance_score: np.ndarray,
+             thresholds: Thresholds = DEFAULT_THRESHOLDS) -> np.ndarray:
+    """
+    Vectorized posture classification on raw angles; returns a string array.
+    Same rules as the original _classify_posture:
+      1. too close beats everything
+      2. READING MODE: a straight neck allows more forward lean
+      3. a bent neck is always slouching
+    """
+    status = np.full(np.shape(distance_score), "GOOD", dtype="<U10")
+
+    min_torso = np.where(neck_angle > thresholds.straight_neck,
+                         thresholds.min_torso_reading, thresholds.min_torso)
+    slouching = (torso_angle < min_torso) | (neck_angle < thresholds.min_neck)
+    status[slouching] = "SLOUCHING"
+    status[distance_score > thresholds.too_close_distance] = "TOO_CLOSE"
+    return status
+
+
+def analyze(landmarks: np.ndarray, thresholds: Thresholds = DEFAULT_THRESHOLDS) -> Dict[str, np.ndarray]:
+    """
+    Measure and classify (N, 33, 3) landmarks in one pass.
+    Angles are returned in the reported form stored in PostureLog:
+    neck_angle = 180 - raw (0 is upright), torso_angle = |90 - raw|.
+    """
+    m = measure(landmarks)
+    status = classify(m["neck_angle"], m["torso_angle"], m["distance_score"], thresholds)
+    return {
+        "posture_status": status,
+        "neck_angle": 180 - m["neck_angle"],
+        "torso_angle": np.abs(90 - m["torso_angle"]),
+        "distance_score": m["distance_score"],
+        "confidence": m["confidence"],
+        "shoulder_width": m["shoulder_width"],
+    }
@@ -0,0 +1,53 @@
+"""
+Session stop notifications for worker-side per-session state.
+Worker processes keep some state per session in memory (VIDEO landmarkers,
+ROI boxes, frame dedup entries, evidence throttling). stop_session publishes
+the session_id on SESSION_STOPPED_CHANNEL and each worker process drops that
+state right away instead of waiting for LRU / idle eviction.
+"""
+
+import threading
+import time
+from typing import Callable
+
+import redis
+
+from app.core.config import settings
+
+SESSION_STOPPED_CHANNEL = "session_stopped"
+
+
+def publish_session_stopped(session_id: int):
+    """Tell every worker to release state held for this session."""
+    try:
+        redis.from_url(settings.redis_url).publish(SESSION_STOPPED_CHANNEL, session_id)
+    except Exception as e:
+        print(f"Session stop publish failed: {e}")
+
+
+class SessionStopListener:
+    """Calls on_stop(session_id) for every stopped session, from a daemon thread."""
+
+    def __init__(self, on_stop: Callable[[int], None]):
+        self.on_stop = on_stop
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._listen, name="session-stop", daemon=True)
+                    self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = redis.from_url(settings.redis_url, decode_responses=True).pubsub()
+                pubsub.subscribe(SESSION_STOPPED_CHANNEL)
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.on_stop(int(message["data"]))
+            except Exception as e:
+                print(f"Session stop listener error: {e}")
+                time.sleep(1.0)
@@ -0,0 +1,79 @@
+"""
+Active-session registry for frame admission.
+Every frame request has to check that its session exists and is active.
+Instead of a Postgres query per frame, the state lives in Redis under
+session:{id}:state, written by start_session / stop_session. The database
+is consulted only on a miss (e.g. after a Redis restart or for sessions
+started before the registry existed), and the answer is cached again.
+
+    active    -> admitted
+    inactive  -> 400, cached briefly (the session could in theory change)
+    missing   -> 404, cached briefly
+"""
+
+from typing import Optional
+
+import redis
+import redis.asyncio as aredis
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import database
+
+ACTIVE, INACTIVE, MISSING = "active", "inactive", "missing"
+
+# Sync client for the (sync) session endpoints, async client for frame admission
+_redis = redis.from_url(settings.redis_url, decode_responses=True)
+_aredis = aredis.from_url(settings.redis_url, decode_responses=True)
+
+
+def _key(session_id: int) -> str:
+    return f"session:{session_id}:state"
+
+
+def _ttl(state: str) -> int:
+    return settings.session_registry_ttl_seconds if state == ACTIVE else settings.session_registry_negative_ttl_seconds
+
+
+def mark_active(session_id: int):
+    try:
+        _redis.set(_key(session_id), ACTIVE, ex=_ttl(ACTIVE))
+    except Exception as e:
+        print(f"Session registry update failed: {e}")
+
+
+def mark_inactive(session_id: int):
+    try:
+        _redis.set(_key(session_id), INACTIVE, ex=_ttl(INACTIVE))
+    except Exception as e:
+        print(f"Session registry update failed: {e}")
+
+
+def _load_state(session_id: int) -> str:
+    db = SessionLocal()
+    try:
+        status = db.query(database.Session.status).filter(database.Session.id == session_id).scalar()
+    finally:
+        db.close()
+    if status is None:
+        return MISSING
+    return ACTIVE if status == "active" else INACTIVE
+
+
+async def session_state(session_id: int) -> str:
+    """ACTIVE, INACTIVE or MISSING; one Redis GET in steady state."""
+    state: Optional[str] = None
+    try:
+        state = await _aredis.get(_key(session_id))
+    except Exception as e:
+        print(f"Session registry lookup failed: {e}")
+
+    if state is None:
+        # Miss: ask the database off the event loop, then cache the answer
+        state = await run_in_threadpool(_load_state, session_id)
+        try:
+            await _aredis.set(_key(session_id), state, ex=_ttl(state))
+        except Exception as e:
+            print(f"Session registry update failed: {e}")
+    return state
@@ -0,0 +1,143 @@
+"""
+Worker-side cache of the per-user settings that apply to a session.
+The evidence path and the alert rules need the session's user, that user's
+UserSettings flags and their alert preferences on every frame. They change
+rarely, so they are cached per session_id with a TTL, and
+update_user_settings publishes the user_id on
+SETTINGS_CHANNEL so every worker drops that user's entries right away.
+The TTL only matters if an invalidation is missed.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Optional
+
+import redis
+
+from app.core.alert_rules import rules_from_preferences
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import database
+
+SETTINGS_CHANNEL = "user_settings_updates"
+
+# What the evidence locker and alert rules need to know about a session's user
+SessionSettings = namedtuple("SessionSettings", ["user_id", "evidence_enabled", "blur_enabled", "alert_rules"])
+
+
+def publish_settings_change(user_id: int):
+    """Tell every worker to drop cached settings of this user."""
+    try:
+        redis.from_url(settings.redis_url).publish(SETTINGS_CHANNEL, user_id)
+    except Exception as e:
+        print(f"Settings invalidation publish failed: {e}")
+
+
+class SessionSettingsCache:
+    """session_id -> SessionSettings with TTL, LRU bound and pub/sub invalidation."""
+
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float = 5.0, max_sessions: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_sessions = max_sessions
+        # session_id -> (SessionSettings or None for a missing session, fetched_at)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        # Bumped by every invalidation; a load that overlaps one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def get(self, session_id: int) -> Optional[SessionSettings]:
+        """Settings for the session's user, or None if the session does not exist."""
+        self._ensure_listener()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            # Missing sessions are cached too, for the shorter negative TTL
+            ttl = self.ttl_seconds if entry is None or entry[0] is not None else self.negative_ttl_seconds
+            if entry is not None and now - entry[1] < ttl:
+                self._entries.move_to_end(session_id)
+                return entry[0]
+            generation = self._generation
+
+        value = self._load(session_id)
+        with self._lock:
+            # An invalidation that arrived while we were loading may have been
+            # about this row: use it for this call, but do not cache it
+            if generation == self._generation:
+                self._entries[session_id] = (value, now)
+                self._entries.move_to_end(session_id)
+                while len(self._entries) > self.max_sessions:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._generation += 1
+            for session_id in [sid for sid, (value, _) in self._entries.items()
+                               if value is not None and value.user_id == user_id]:
+                del self._entries[session_id]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    @staticmethod
+    def _load(session_id: int) -> Optional[SessionSettings]:
+        # One round-trip: session's user joined with their (optional) settings row
+        db = SessionLocal()
+        try:
+            row = db.query(
+                database.Session.user_id,
+                database.UserSettings.enabled_evidence_locker,
+                database.UserSettings.blur_screenshots,
+                database.User.preferences,
+            ).join(
+                database.User, database.User.id == database.Session.user_id
+            ).outerjoin(
+                database.UserSettings, database.UserSettings.user_id == database.Session.user_id
+            ).filter(database.Session.id == session_id).first()
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+        user_id, enabled, blur, preferences = row
+        # No settings row yet: the UserSettings column defaults (both on)
+        return SessionSettings(user_id, enabled is not False, blur is not False, rules_from_preferences(preferences))
+
+    def _ensure_listener(self):
+        if self._listener is None or not self._listener.is_alive():
+            with self._lock:
+                if self._listener is None or not self._listener.is_alive():
+                    self._listener = threading.Thread(target=self._listen, name="settings-invalidation", daemon=True)
+                    self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = redis.from_url(settings.redis_url, decode_responses=True).pubsub()
+                pubsub.subscribe(SETTINGS_CHANNEL)
+                # Anything cached before (re)subscribing may have missed an update
+                self.clear()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate_user(int(message["data"]))
+            except Exception as e:
+                print(f"Settings invalidation listener error: {e}")
+                time.sleep(1.0)
+
+
+# Global instance (per worker process)
+_cache = None
+
+def get_settings_cache() -> SessionSettingsCache:
+    global _cache
+    if _cache is None:
+        _cache = SessionSettingsCache(
+            ttl_seconds=settings.settings_cache_ttl_seconds,
+            negative_ttl_seconds=settings.session_registry_negative_ttl_seconds,
+        )
+    return _cache
@@ -1,11 +1,13 @@
 from fastapi import WebSocket
-from typing import List
+from typing import Dict, List
 import json
 import logging
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # Bidirectional per-session sockets (frames up, results down)
+        self.session_connections: Dict[int, List[WebSocket]] = {}
         self.logger = logging.getLogger("websocket_manager")
 
     async def connect(self, websocket: WebSocket):
@@ -18,9 +20,30 @@ class ConnectionManager:
             self.active_connections.remove(websocket)
             self.logger.info(f"Client disconnected. Active connections: {len(self.active_connections)}")
 
+    def attach_session(self, session_id: int, websocket: WebSocket):
+        """Register an already-accepted socket as a session channel."""
+        self.session_connections.setdefault(session_id, []).append(websocket)
+        self.logger.info(f"Session {session_id} channel attached")
+
+    def detach_session(self, session_id: int, websocket: WebSocket):
+        connections = self.session_connections.get(session_id)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
+                del self.session_connections[session_id]
+            self.logger.info(f"Session {session_id} channel detached")
+
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         await websocket.send_json(message)
 
+    async def send_to_session(self, session_id: int, message: dict):
+        """Send message to the channels bound to one session."""
+        for connection in list(self.session_connections.get(session_id, [])):
+            try:
+                await connection.send_json(message)
+            except Exception as e:
+                self.logger.error(f"Error sending session message: {e}")
+
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients."""
         for connection in self.active_connections:
@@ -31,5 +54,19 @@ class ConnectionManager:
                 # We might want to disconnect here, but let's be safe
                 # self.disconnect(connection)
 
+    async def dispatch(self, message: dict):
+        """
+        Route a worker message: session-scoped messages also go to that
+        session's channels, everything else goes to every session channel.
+        """
+        await self.broadcast(message)
+        
+        session_id = message.get("session_id")
+        if session_id is not None:
+            await self.send_to_session(session_id, message)
+        else:
+            for sid in list(self.session_connections):
+                await self.send_to_session(sid, message)
+
 # Global Instance
 manager = ConnectionManager()
@@ -3,8 +3,32 @@ Database initialization script.
 Creates all tables defined in the models and sets up default user.
 """
 
+from sqlalchemy import text
+
 from app.db.session import engine, Base, SessionLocal
-from app.models.database import User, Session, PostureLog, Pattern, Alert, DailyReport
+from app.models.database import User, Session, PostureLog, Pattern, Alert, DailyReport, EvidenceItem
+
+# Columns added after the first release. create_all() never alters existing
+# tables, so add them in place (idempotent on PostgreSQL).
+COLUMN_UPGRADES = [
+    ("posture_logs", "model_tier VARCHAR(10)"),
+    ("posture_logs", "classifier_version INTEGER"),
+]
+
+
+# Indexes added to existing tables after the first release (name, table (columns))
+INDEX_UPGRADES = [
+    ("ix_evidence_items_captured", "evidence_items (captured_at)"),
+]
+
+
+def upgrade_columns():
+    """Add any missing columns from COLUMN_UPGRADES and indexes from INDEX_UPGRADES."""
+    with engine.begin() as conn:
+        for table, column in COLUMN_UPGRADES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}"))
+        for name, target in INDEX_UPGRADES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
 
 
 def init_db():
@@ -14,6 +38,7 @@ def init_db():
     """
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_columns()
     print("✓ Database tables created successfully!")
     
     # Create default user if not exists
@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.db.session import engine
-from app.api import users, sessions, posture, websockets
+from app.api import users, sessions, posture, websockets, metrics
 import redis.asyncio as redis
 from app.core.celery_app import REDIS_URL
 from app.core.socket_manager import manager
@@ -23,7 +23,7 @@ async def redis_listener():
             if message["type"] == "message":
                 try:
                     data = json.loads(message["data"])
-                    await manager.broadcast(data)
+                    await manager.dispatch(data)
                 except json.JSONDecodeError:
                     print(f"Error decoding Redis message: {message['data']}")
     except Exception as e:
@@ -68,6 +68,7 @@ app.add_middleware(
 app.include_router(users.router, prefix=settings.api_v1_prefix)
 app.include_router(sessions.router, prefix=settings.api_v1_prefix)
 app.include_router(posture.router, prefix=settings.api_v1_prefix)
+app.include_router(metrics.router, prefix=settings.api_v1_prefix)
 app.include_router(websockets.router) # WebSocket endpoint
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -40,6 +40,7 @@ class Session(Base):
     posture_logs = relationship("PostureLog", back_populates="session", cascade="all, delete-orphan")
     patterns = relationship("Pattern", back_populates="session", cascade="all, delete-orphan")
     alerts = relationship("Alert", back_populates="session", cascade="all, delete-orphan")
+    evidence_items = relationship("EvidenceItem", back_populates="session", cascade="all, delete-orphan")
 
 
 class PostureLog(Base):
@@ -56,6 +57,8 @@ class PostureLog(Base):
     distance_score = Column(Float, nullable=True)  # 0-1 normalized
     confidence = Column(Float, nullable=True)  # MediaPipe confidence
     landmarks = Column(JSON, nullable=True)  # Optional: full pose landmarks
+    model_tier = Column(String(10), nullable=True)  # lite, full, heavy (NULL = client landmarks / legacy)
+    classifier_version = Column(Integer, nullable=True)  # threshold set that produced posture_status
     
     # Relationships
     session = relationship("Session", back_populates="posture_logs")
@@ -121,6 +124,30 @@ class DailyReport(Base):
     user = relationship("User", back_populates="daily_reports")
 
 
+class EvidenceItem(Base):
+    """Catalog of evidence locker images (files live under the evidence directory)."""
+    
+    __tablename__ = "evidence_items"
+    __table_args__ = (
+        # Quota/retention scans walk a session's or user's items oldest first
+        Index("ix_evidence_items_session_captured", "session_id", "captured_at"),
+        Index("ix_evidence_items_user_captured", "user_id", "captured_at"),
+        # Retention sweep across all users
+        Index("ix_evidence_items_captured", "captured_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    captured_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    size_bytes = Column(Integer, nullable=False)
+    path = Column(String(512), nullable=False, unique=True)
+    image_format = Column(String(10), nullable=False)  # jpg, webp
+    
+    # Relationships
+    session = relationship("Session", back_populates="evidence_items")
+
+
 class UserSettings(Base):
     """User configuration for Enterprise features."""
     
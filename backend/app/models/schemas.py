@@ -92,6 +92,8 @@ class PostureLogCreate(PostureLogBase):
 class PostureLog(PostureLogBase):
     id: int
     timestamp: datetime
+    model_tier: Optional[str] = None
+    classifier_version: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -144,6 +146,20 @@ class Alert(AlertBase):
         from_attributes = True
 
 
+# Evidence Schemas
+class EvidenceItem(BaseModel):
+    id: int
+    session_id: int
+    user_id: int
+    captured_at: datetime
+    size_bytes: int
+    path: str
+    image_format: str
+    
+    class Config:
+        from_attributes = True
+
+
 # Daily Report Schemas
 class DailyReportBase(BaseModel):
     user_id: int
@@ -0,0 +1,15 @@
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.evidence_locker import get_evidence_store
+
+
+@celery_app.task
+def prune_evidence_task():
+    """Enforce evidence_retention_days across all users (hourly, from Celery beat)."""
+    if not settings.evidence_retention_days:
+        return 0
+    try:
+        return get_evidence_store().prune_expired()
+    except Exception as e:
+        print(f"❌ Evidence prune failed: {e}")
+        return 0
@@ -1,163 +1,440 @@
 from app.core.celery_app import celery_app
-from app.core.posture_detector import get_detector
+from app.core.posture_detector import get_detector_pool, get_classifier
+from app.core.posture_geometry import empty_landmarks
+from app.core.frame import Frame
+from app.core.frame_dedup import get_frame_dedup
+from app.core.frame_store import FrameExpired, get_frame_store, is_ref, to_bytes
+from app.core.frame_coalescer import get_frame_coalescer
+from app.core.evidence_locker import get_evidence_locker
+from app.core.log_writer import get_log_writer
+from app.core.settings_cache import get_settings_cache
+from app.core.session_events import SessionStopListener
+from app.core.alert_rules import AlertEngine, alert_message, default_rules
+from app.core.memory_report import process_memory
+from app.core.config import settings
+from app.core import metrics
 from app.db.session import SessionLocal
 from app.models import database
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
+from celery_batches import Batches
 from datetime import datetime
+from sqlalchemy import insert
 import redis
+import gc
 import json
 import time
 import os
-import cv2
-import numpy as np
-import base64
+import socket
 
 # Connect to Redis (Sync for Celery)
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 r = redis.from_url(REDIS_URL, decode_responses=True)
+alert_engine = AlertEngine(r)
 
-# Evidence Directory
-EVIDENCE_DIR = "/app/data/evidence"
-os.makedirs(EVIDENCE_DIR, exist_ok=True)
 
-@celery_app.task(bind=True)
-def analyze_frame_task(self, frame_base64: str, session_id: int):
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@worker_process_init.connect
+def preload_detector(**kwargs):
+    """
+    Load and warm the pose model in each prefork child before it accepts
+    tasks, so the first frame after a deploy or recycle does not stall.
+    """
+    if settings.detector_preload:
+        warm_detector()
+
+
+@worker_init.connect
+def prepare_worker(sender=None, **kwargs):
+    if "prefork" in str(getattr(sender, "pool_cls", "prefork")):
+        # Parent process, before forking the children
+        if settings.detector_freeze_parent_heap:
+            freeze_parent_heap()
+    elif settings.detector_preload:
+        # solo / threads pools have no child processes (and no worker_process_init)
+        warm_detector()
+
+
+def freeze_parent_heap():
+    """
+    Freeze the GC in the prefork parent so collections in the children do
+    not touch (and copy) inherited objects. Model files are not preloaded:
+    each child memory-maps them by path, which the page cache already shares.
+    """
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 Parent heap frozen before fork ({gc.get_freeze_count()} objects)")
+    _record_memory()
+
+
+def _record_memory():
+    """USS/PSS/RSS of this process into the worker_memory metrics group."""
+    memory = process_memory()
+    if memory:
+        metrics.set_gauges("worker_memory", **{f"{_worker_name()}_{k}": v for k, v in memory.items()})
+
+
+def warm_detector():
+    """Build and warm the detector pool; readiness and timings go to metrics."""
+    start = time.perf_counter()
+    try:
+        timings = get_detector_pool().warm_up()
+    except Exception as e:
+        print(f"❌ Detector warm-up failed: {e}")
+        return
+    cold_start_ms = (time.perf_counter() - start) * 1000
+    
+    metrics.set_gauges("detector_warmup", cold_start_ms=round(cold_start_ms, 2),
+                       **{f"warmup_ms_{tier}": round(ms, 2) for tier, ms in timings.items()})
+    metrics.set_gauges("detector_ready", **{_worker_name(): time.time()})
+    _record_memory()
+    print(f"🔥 Detector warm ({', '.join(timings) or 'no model'}) in {cold_start_ms:.0f} ms")
+
+
+@worker_process_shutdown.connect
+def flush_write_behind(**kwargs):
+    # Buffered PostureLog rows and queued evidence must reach the DB/disk before the process exits;
+    # the process is no longer ready for frames
+    try:
+        get_log_writer().flush()
+    except Exception as e:
+        print(f"PostureLog flush on shutdown failed: {e}")
+    get_evidence_locker().flush(timeout=5.0)
+    try:
+        r.hdel(metrics.METRICS_PREFIX + "detector_ready", _worker_name())
+    except Exception:
+        pass
+
+
+# Frame tasks never store results: the outcome goes out via Redis pub/sub
+# and nobody reads the result backend. seq / enqueued_at come from the
+# coalescer stamp in submit_frame (absent on messages queued without it).
+@celery_app.task(bind=True, ignore_result=True)
+def analyze_frame_task(self, frame_base64: str, session_id: int, seq: int = None, enqueued_at: float = None):
+    try:
+        return analyze_queued_frame(frame_base64, session_id, seq, enqueued_at)
+    except Exception as e:
+        print(f"Error in analyze_frame_task: {e}")
+        return {"error": str(e)}
+
+
+@celery_app.task(bind=True, serializer="msgpack", ignore_result=True)
+def analyze_frame_bytes_task(self, frame_bytes: bytes, session_id: int, seq: int = None, enqueued_at: float = None):
+    """
+    Binary sibling of analyze_frame_task.
+    The raw JPEG travels as msgpack bin (never as text) straight into cv2.imdecode.
+    """
+    try:
+        return analyze_queued_frame(frame_bytes, session_id, seq, enqueued_at)
+    except Exception as e:
+        print(f"Error in analyze_frame_bytes_task: {e}")
+        return {"error": str(e)}
+
+
+@celery_app.task(bind=True, ignore_result=True)
+def analyze_frame_ref_task(self, frame_ref: str, session_id: int, seq: int = None, enqueued_at: float = None):
+    """
+    Frame task whose message only carries a frame blob store reference
+    (see app.core.frame_store); the JPEG itself never touches the broker.
+    """
+    try:
+        return analyze_queued_frame(frame_ref, session_id, seq, enqueued_at)
+    except Exception as e:
+        print(f"Error in analyze_frame_ref_task: {e}")
+        return {"error": str(e)}
+
+
+def analyze_queued_frame(frame_data, session_id, seq=None, enqueued_at=None):
+    """Admission check, then decode once; the same Frame feeds detection and the evidence locker."""
+    if not admit_frames([(frame_data, session_id, seq, enqueued_at)])[0]:
+        return None
+    try:
+        frame = load_frame(frame_data)
+    except FrameExpired:
+        return None
+    result = analyze_session_frame(frame, session_id)
+    return process_result(result, session_id, frame)
+
+
+def admit_frames(frames):
+    """
+    Latest-frame-wins / max-age check for (frame_data, session_id, seq,
+    enqueued_at) tuples in one round-trip (see app.core.frame_coalescer).
+    Dropped frames are released from the blob store. Returns one bool per frame.
+    """
+    stamped = [i for i, (_, _, seq, _) in enumerate(frames) if seq is not None]
+    admitted = [True] * len(frames)
+    if not stamped:
+        return admitted
+    
+    try:
+        reasons = get_frame_coalescer().admit([frames[i][1:] for i in stamped])
+    except Exception as e:
+        print(f"Frame admission check failed: {e}")
+        return admitted
+    
+    dropped = {}
+    for i, reason in zip(stamped, reasons):
+        if reason:
+            admitted[i] = False
+            dropped[reason] = dropped.get(reason, 0) + 1
+            store = get_frame_store()
+            if store is not None and is_ref(frames[i][0]):
+                store.discard(frames[i][0])
+    metrics.record("frame_coalescing", admitted=len(stamped) - sum(dropped.values()), **dropped)
+    return admitted
+
+
+@celery_app.task(
+    base=Batches,
+    flush_every=settings.posture_batch_size,
+    flush_interval=settings.posture_batch_linger_ms / 1000,
+    serializer="msgpack",
+    ignore_result=True,
+)
+def analyze_frame_batch_task(requests):
+    """
+    Micro-batching consumer: Celery hands over up to posture_batch_size
+    frames (or whatever arrived within posture_batch_linger_ms). Inference
+    runs back-to-back, then all rows and publishes go out in one shot.
+    Each request carries (frame, session_id[, seq, enqueued_at]), frame as
+    a blob store reference, base64 str or raw bytes. Superseded and stale
+    frames are dropped before decode.
+    """
+    start = time.perf_counter()
+    frames = []
+    for request in requests:
+        frame_data, session_id, *stamp = request.args
+        seq, enqueued_at = stamp if stamp else (None, None)
+        frames.append((frame_data, session_id, seq, enqueued_at))
+    
+    items = []
+    for (frame_data, session_id, _, _), admitted in zip(frames, admit_frames(frames)):
+        if not admitted:
+            continue
+        try:
+            frame = load_frame(frame_data)
+            items.append((analyze_session_frame(frame, session_id), session_id, frame))
+        except FrameExpired:
+            continue
+        except Exception as e:
+            print(f"Error in analyze_frame_batch_task (session {session_id}): {e}")
+
+    if items:
+        try:
+            process_results(items)
+        except Exception as e:
+            print(f"Error in analyze_frame_batch_task: {e}")
+
+    metrics.record("posture_batch", batches=1, frames=len(items),
+                   batch_ms=(time.perf_counter() - start) * 1000)
+
+
+def submit_frame(frame_data, session_id):
+    """
+    Queue a frame (base64 string or raw JPEG bytes) for analysis on the
+    configured consumer: the micro-batcher or one task per frame.
+    With a frame blob store the bytes are parked there and only the
+    reference is queued. Raises ValueError on invalid base64.
+    """
+    store = get_frame_store()
+    if store is not None:
+        frame_data = store.put(to_bytes(frame_data))
+    
+    # Sequence number + enqueue time for latest-frame-wins / max-age checks
+    stamp = ()
+    if settings.frame_coalescing_enabled or settings.frame_max_age_seconds > 0:
+        stamp = get_frame_coalescer().stamp(session_id)
+    
+    if settings.posture_batch_enabled:
+        return analyze_frame_batch_task.delay(frame_data, session_id, *stamp)
+    if is_ref(frame_data):
+        return analyze_frame_ref_task.delay(frame_data, session_id, *stamp)
+    if isinstance(frame_data, str):
+        return analyze_frame_task.delay(frame_data, session_id, *stamp)
+    return analyze_frame_bytes_task.delay(frame_data, session_id, *stamp)
+
+
+def load_frame(frame_data):
+    """
+    Decode a task's frame: blob store reference, base64 string or raw bytes.
+    Raises FrameExpired for a reference whose blob is gone; like a coalesced
+    frame it is dropped, not logged as NO_PERSON.
+    """
+    if is_ref(frame_data):
+        store = get_frame_store()
+        data = store.take(frame_data) if store is not None else None
+        if data is None:
+            print(f"Frame {frame_data} expired before it was analyzed")
+            metrics.record("frame_coalescing", expired=1)
+            raise FrameExpired(frame_data)
+        return Frame.from_bytes(data)
+    return Frame.decode(frame_data)
+
+
+# Running average of real inference time, used to estimate time saved by reuse
+_inference_ms_avg = 0.0
+
+def release_session(session_id):
+    """Drop this process's in-memory state for a stopped session."""
+    get_detector_pool().release_session(session_id)
+    get_frame_dedup().forget(session_id)
+    get_evidence_locker().forget(session_id)
+
+
+session_stop_listener = SessionStopListener(release_session)
+
+
+def analyze_session_frame(frame, session_id):
+    """
+    Analyze a decoded frame, reusing the previous result for near-duplicate
+    frames of the same session (see app.core.frame_dedup).
+    """
+    global _inference_ms_avg
+    session_stop_listener.ensure_started()
+    pool = get_detector_pool()
+    if frame is None or not settings.frame_dedup_enabled:
+        with pool.checkout() as detector:
+            return detector.analyze_frame(frame, session_id=session_id)
+
+    dedup = get_frame_dedup()
+    fingerprint = dedup.fingerprint(frame)
+    cached = dedup.lookup(session_id, fingerprint)
+    if cached is not None:
+        metrics.record("frame_dedup", hits=1, saved_ms=_inference_ms_avg)
+        return dict(cached, reused=True)
+
+    start = time.perf_counter()
+    with pool.checkout() as detector:
+        result = detector.analyze_frame(frame, session_id=session_id)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not _inference_ms_avg:
+        # First real frame of this process: shows whether warm-up did its job
+        metrics.set_gauges("detector_warmup", first_frame_ms=round(elapsed_ms, 2))
+    _inference_ms_avg = elapsed_ms if not _inference_ms_avg else 0.9 * _inference_ms_avg + 0.1 * elapsed_ms
+
+    if result['posture_status'] != 'ERROR':
+        dedup.store(session_id, fingerprint, result)
+    metrics.record("frame_dedup", misses=1, inference_ms=elapsed_ms)
+    return result
+
+
+@celery_app.task(bind=True, ignore_result=True)
+def classify_landmarks_task(self, landmarks: dict, session_id: int):
+    """
+    Classify-only fast path for clients that run pose estimation locally.
+    No decode and no inference: just angles, classification and the usual
+    persistence/broadcast/alerting.
+    """
+    try:
+        points = empty_landmarks(1)[0]
+        for idx, p in landmarks.items():
+            points[int(idx)] = (p['x'], p['y'], p.get('presence', 1.0))
+        result = get_classifier().analyze_landmarks(points)
+        return process_result(result, session_id, None)
+    except Exception as e:
+        print(f"Error in classify_landmarks_task: {e}")
+        return {"error": str(e)}
+
+
+def process_result(result, session_id, frame):
+    """
+    Persist, capture evidence, broadcast and alert on an analysis result.
+    frame is the decoded Frame that was analyzed, or None when decoding
+    failed or the client only sent landmarks.
+    """
+    return process_results([(result, session_id, frame)])[0]
+
+
+def process_results(items):
+    """
+    Batched process_result over (result, session_id, frame) tuples:
+    rows go to the write-behind PostureLog buffer (or one multi-row INSERT
+    when it is disabled), all Redis publishes in one pipelined round-trip.
+    """
     db = SessionLocal()
     try:
-        detector = get_detector()
-        result = detector.analyze_posture(frame_base64)
-        
         # Save to Database
         try:
-            posture_log = database.PostureLog(
-                session_id=session_id,
-                timestamp=datetime.utcnow(),
-                posture_status=result['posture_status'],
-                neck_angle=result.get('neck_angle'),
-                torso_angle=result.get('torso_angle'),
-                distance_score=result.get('distance_score'),
-                confidence=result.get('confidence')
-            )
-            db.add(posture_log)
-            db.commit()
+            now = datetime.utcnow()
+            rows = [_log_row(result, session_id, now) for result, session_id, _ in items]
+            if settings.posture_log_buffer_enabled:
+                get_log_writer().add(rows)
+            else:
+                db.execute(insert(database.PostureLog), rows)
+                db.commit()
             
             # --- ENTERPRISE FEATURE: EVIDENCE LOCKER ---
-            if result['posture_status'] == 'SLOUCHING':
-                # Fetch settings for this session's user
-                session = db.query(database.Session).filter(database.Session.id == session_id).first()
-                if session:
-                    settings = db.query(database.UserSettings).filter(database.UserSettings.user_id == session.user_id).first()
-                    
-                    # Always run Evidence Locker (User Request)
-                    blur_enabled = settings.blur_screenshots if settings else True
-                    
-                    # Process Image
-                    save_evidence(frame_base64, session_id, result.get('landmarks'), blur_enabled)
+            for result, session_id, frame in items:
+                if result['posture_status'] == 'SLOUCHING' and frame is not None:
+                    _capture_evidence(result, session_id, frame)
 
         except Exception as db_err:
             print(f"Database/Evidence error: {db_err}")
             db.rollback()
         
-        # Add timestamp
-        result['timestamp'] = time.time()
-        result['session_id'] = session_id
-        
         # Broadcast to WebSocket via Redis Channel
-        r.publish("posture_updates", json.dumps(result))
-        
-        # --- Alert Logic (> 8 seconds) ---
-        user_key = f"session:{session_id}:slouch_start"
-        alert_cooldown_key = f"session:{session_id}:alert_cooldown"
+        pipe = r.pipeline(transaction=False)
+        for result, session_id, _ in items:
+            # Add timestamp
+            result['timestamp'] = time.time()
+            result['session_id'] = session_id
+            pipe.publish("posture_updates", json.dumps(result))
+        pipe.execute()
         
-        if result['posture_status'] == 'SLOUCHING':
-            start_time = r.get(user_key)
-            if start_time:
-                duration = time.time() - float(start_time)
-                if duration > 8:
-                    # Check cooldown
-                    if not r.get(alert_cooldown_key):
-                        # Trigger Notification Worker
-                        celery_app.send_task(
-                            "app.workers.notification_worker.send_notification_task",
-                            args=["SLOUCH_ALERT", "You have been slouching for over 8 seconds!"]
-                        )
-                        # Set cooldown (e.g., 2 minutes)
-                        r.setex(alert_cooldown_key, 120, "1")
-            else:
-                # Start tracking
-                r.set(user_key, time.time())
-        else:
-            # Reset tracker if posture is good
-            r.delete(user_key)
+        evaluate_alerts(items)
             
-        return result
-    except Exception as e:
-        print(f"Error in analyze_frame_task: {e}")
-        return {"error": str(e)}
+        return [result for result, _, _ in items]
     finally:
         db.close()
 
-def save_evidence(base64_string, session_id, landmarks, blur_enabled):
+
+def _log_row(result, session_id, timestamp):
+    """PostureLog column values for one result."""
+    return {
+        "session_id": session_id,
+        "timestamp": timestamp,
+        "posture_status": result['posture_status'],
+        "neck_angle": result.get('neck_angle'),
+        "torso_angle": result.get('torso_angle'),
+        "distance_score": result.get('distance_score'),
+        "confidence": result.get('confidence'),
+        "model_tier": result.get('model_tier'),
+        "classifier_version": result.get('classifier_version'),
+    }
+
+
+def _capture_evidence(result, session_id, frame):
+    # Session -> user settings from the worker cache (no queries in steady state)
+    session_settings = get_settings_cache().get(session_id)
+    if session_settings and session_settings.evidence_enabled:
+        # Hand off to the write-behind locker (blur/encode/write off the inference path)
+        get_evidence_locker().submit(frame, session_id, session_settings.user_id,
+                                     result.get('landmarks'), session_settings.blur_enabled)
+
+
+def evaluate_alerts(items):
     """
-    Decodes image, blurs face if enabled, and saves to disk.
+    Advance each session's alert state (one atomic script per frame, all in
+    one pipeline) and send the notifications that fire.
     """
-    try:
-        # Decode Base64
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        img_data = base64.b64decode(base64_string)
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            print(f"⚠️ Evidence Locker: Failed to decode image for Session {session_id}")
-            return
-
-        if blur_enabled and landmarks:
-            # MediaPipe landmarks: 0 (Nose), 7 (Left Ear), 8 (Right Ear)
-            h, w, c = img.shape
-            
-            # Use '0' for nose (as string per posture_detector.py)
-            nose_lm = landmarks.get('0', {'x': 0.5, 'y': 0.5})
-            ear_l_lm = landmarks.get('7')
-            ear_r_lm = landmarks.get('8')
-            
-            nose_x = int(nose_lm.get('x', 0.5) * w)
-            nose_y = int(nose_lm.get('y', 0.5) * h)
-            
-            # Determine dynamic box size based on ears if available
-            if ear_l_lm and ear_r_lm:
-                ear_l_x = ear_l_lm.get('x', 0.5) * w
-                ear_r_x = ear_r_lm.get('x', 0.5) * w
-                face_width = abs(ear_l_x - ear_r_x) * 2.0  # 2x ear distance
-                box_radius = int(face_width / 2)
-                # Ensure minimum size (10% of width)
-                box_radius = max(box_radius, int(w * 0.1))
-            else:
-                # Fallback: 15% of width
-                box_radius = int(w * 0.15)
-            
-            x1 = max(0, nose_x - box_radius)
-            y1 = max(0, nose_y - box_radius)
-            x2 = min(w, nose_x + box_radius)
-            y2 = min(h, nose_y + box_radius)
-            
-            # Apply Gaussian Blur to ROI
-            roi = img[y1:y2, x1:x2]
-            if roi.size > 0:
-                blurred_roi = cv2.GaussianBlur(roi, (99, 99), 30) # Stronger blur
-                img[y1:y2, x1:x2] = blurred_roi
-                print(f"🕵️ Evidence Locker: Face blurred for Session {session_id} at ({nose_x}, {nose_y})")
-
-        # Save to disk
-        timestamp = int(time.time())
-        filename = f"{EVIDENCE_DIR}/session_{session_id}_{timestamp}.jpg"
-        
-        # Check if file already exists (unlikely with timestamp) or throttle
-        # For demo, only save if not exists
-        if not os.path.exists(filename):
-             cv2.imwrite(filename, img)
-             print(f"📸 Evidence Locker: Saved {filename}")
-             
-    except Exception as e:
-        print(f"❌ Evidence Locker Failed: {e}")
+    cache = get_settings_cache()
+    events = []
+    for result, session_id, _ in items:
+        if result['posture_status'] == 'ERROR':
+            continue
+        session_settings = cache.get(session_id)
+        rules = session_settings.alert_rules if session_settings else default_rules()
+        events.append((session_id, result['posture_status'], rules))
+    if not events:
+        return
+    
+    for (session_id, _, rules), fired in zip(events, alert_engine.evaluate(events, time.time())):
+        for alert_type in fired:
+            # Trigger Notification Worker
+            celery_app.send_task(
+                "app.workers.notification_worker.send_notification_task",
+                args=[alert_type, alert_message(alert_type, rules)]
+            )
@@ -0,0 +1,127 @@
+"""
+Bulk re-classification of historical posture logs.
+When the thresholds change (a new entry in posture_geometry.CLASSIFIER_VERSIONS),
+existing PostureLog rows keep the status of the old rules. This job walks the
+table in id order (keyset pagination, one chunk in memory at a time),
+re-classifies each chunk in one vectorized pass and writes the results back
+with one bulk UPDATE per chunk. Each chunk commits on its own, so the job can
+be stopped and re-run: rows already at the target version are skipped.
+
+Rows with stored landmarks are re-measured from them. Everything else is
+classified from the stored angles (see raw_angles_from_reported for the
+one assumption that involves).
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core import posture_geometry as geometry
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import engine
+
+# Only rows that were actually classified; NO_PERSON / ERROR stay as they are
+CLASSIFIED_STATUSES = ("GOOD", "SLOUCHING", "TOO_CLOSE")
+
+SELECT_CHUNK = text("""
+    SELECT id, posture_status, neck_angle, torso_angle, distance_score, landmarks
+    FROM posture_logs
+    WHERE id > :last_id
+      AND posture_status = ANY(:statuses)
+      AND neck_angle IS NOT NULL AND torso_angle IS NOT NULL AND distance_score IS NOT NULL
+      AND classifier_version IS DISTINCT FROM :version
+    ORDER BY id
+    LIMIT :chunk_size
+""")
+
+UPDATE_STATUS = """
+    UPDATE posture_logs AS p
+    SET posture_status = v.status, classifier_version = v.version
+    FROM (VALUES %s) AS v(id, status, version)
+    WHERE p.id = v.id
+"""
+
+STAMP_VERSION = text("""
+    UPDATE posture_logs SET classifier_version = :version
+    WHERE id = ANY(:ids)
+""")
+
+
+def classify_rows(rows, thresholds: geometry.Thresholds) -> np.ndarray:
+    """New status for a chunk of (id, status, neck, torso, distance, landmarks) rows."""
+    neck = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    torso = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    distance = np.fromiter((row[4] for row in rows), dtype=np.float64, count=len(rows))
+    raw_neck, raw_torso = geometry.raw_angles_from_reported(neck, torso)
+
+    # Rows that carry landmarks get re-measured from the points themselves
+    with_landmarks = [i for i, row in enumerate(rows) if row[5]]
+    if with_landmarks:
+        arr = geometry.empty_landmarks(len(with_landmarks))
+        for n, i in enumerate(with_landmarks):
+            for idx, point in rows[i][5].items():
+                arr[n, int(idx)] = (point["x"], point["y"], point.get("presence", 1.0))
+        measured = geometry.measure(arr)
+        raw_neck[with_landmarks] = measured["neck_angle"]
+        raw_torso[with_landmarks] = measured["torso_angle"]
+        distance[with_landmarks] = measured["distance_score"]
+
+    return geometry.classify(raw_neck, raw_torso, distance, thresholds)
+
+
+def reclassify_posture_logs(version: Optional[int] = None, chunk_size: Optional[int] = None,
+                            max_rows: Optional[int] = None) -> Dict:
+    """
+    Re-classify every classified PostureLog row to the given threshold version.
+    Returns counts of scanned and changed rows.
+    """
+    version = version or settings.classifier_version
+    chunk_size = chunk_size or settings.reclassify_chunk_size
+    thresholds = geometry.thresholds_for(version)
+
+    scanned = changed = 0
+    last_id = 0
+    start = time.perf_counter()
+    print(f"🔁 Re-classifying posture logs to classifier v{version} (chunks of {chunk_size})")
+
+    while max_rows is None or scanned < max_rows:
+        with engine.begin() as conn:
+            rows = conn.execute(SELECT_CHUNK, {
+                "last_id": last_id, "statuses": list(CLASSIFIED_STATUSES),
+                "version": version, "chunk_size": chunk_size,
+            }).fetchall()
+            if not rows:
+                break
+
+            statuses = classify_rows(rows, thresholds)
+            updates = [(row[0], str(status), version)
+                       for row, status in zip(rows, statuses) if status != row[1]]
+            unchanged = [row[0] for row, status in zip(rows, statuses) if status == row[1]]
+
+            # One statement for the status changes, one to stamp the rest
+            if updates:
+                cursor = conn.connection.cursor()
+                execute_values(cursor, UPDATE_STATUS, updates, page_size=len(updates))
+                cursor.close()
+            if unchanged:
+                conn.execute(STAMP_VERSION, {"version": version, "ids": unchanged})
+
+        scanned += len(rows)
+        changed += len(updates)
+        last_id = rows[-1][0]
+
+    elapsed = time.perf_counter() - start
+    metrics.record("reclassify", rows=scanned, changed=changed)
+    print(f"✅ Re-classified {scanned} rows ({changed} changed) in {elapsed:.1f}s")
+    return {"version": version, "scanned": scanned, "changed": changed, "seconds": round(elapsed, 2)}
+
+
+@celery_app.task
+def reclassify_posture_logs_task(version: Optional[int] = None, chunk_size: Optional[int] = None):
+    """Background form of reclassify_posture_logs (runs on analysis_queue)."""
+    return reclassify_posture_logs(version, chunk_size)
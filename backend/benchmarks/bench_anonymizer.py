@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Face Anonymizer Benchmark
+Reports ms/frame of each evidence anonymization strategy at common camera
+resolutions. The face box is derived from a typical seated pose (ears ~15%
+of the frame width apart), so the ROI scales with the frame like it does
+in production.
+
+Usage:
+    python -m benchmarks.bench_anonymizer [--frames 200]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.anonymizer import ANONYMIZERS, anonymize_face, face_box
+
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720), (1920, 1080))
+
+# Normalized skeleton landmarks of a user facing the camera
+LANDMARKS = {
+    '0': {'x': 0.50, 'y': 0.30},
+    '7': {'x': 0.575, 'y': 0.28},
+    '8': {'x': 0.425, 'y': 0.28},
+}
+
+
+def time_strategy(strategy, frame, frames):
+    img = frame.copy()
+    anonymize_face(img, LANDMARKS, strategy)  # warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        img[:] = frame
+        anonymize_face(img, LANDMARKS, strategy)
+    copy_start = time.perf_counter()
+    for _ in range(frames):
+        img[:] = frame
+    copy_s = time.perf_counter() - copy_start
+    # Subtract the frame reset so only the anonymization is counted
+    return (copy_start - start - copy_s) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evidence anonymization strategies")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    strategies = list(ANONYMIZERS)
+
+    print(f"\n{'='*72}")
+    print(f"Face anonymization, ms/frame ({args.frames} frames each)")
+    print(f"{'='*72}")
+    print(f"{'resolution':<12}{'face box':>12}" + "".join(f"{s:>12}" for s in strategies))
+    for width, height in RESOLUTIONS:
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        x1, y1, x2, y2 = face_box(LANDMARKS, width, height)
+        row = f"{f'{width}x{height}':<12}{f'{x2 - x1}x{y2 - y1}':>12}"
+        for strategy in strategies:
+            row += f"{time_strategy(strategy, frame, args.frames):>12.3f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
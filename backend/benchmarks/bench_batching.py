@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Posture Consumer Throughput Benchmark
+Compares one-task-per-frame processing with the micro-batching consumer.
+
+Runs the worker code in-process against the real Postgres and Redis
+(start them with podman-compose and run setup_db.py first), so it measures
+decode + inference + PostureLog insert/commit + Redis publish per frame.
+The first two modes run with the PostureLog write-behind buffer off (one
+INSERT + commit per task); the third adds the buffer to the batched consumer,
+including the final flush.
+A throwaway session is created for user 1 and closed afterwards.
+
+Usage:
+    python -m benchmarks.bench_batching [--frames 400] [--batch 16]
+"""
+
+import argparse
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.log_writer import get_log_writer
+from app.db.session import SessionLocal
+from app.models import database
+from app.workers import posture_worker
+
+
+def make_frames(count, width=640, height=480):
+    """Distinct synthetic JPEGs (so near-duplicate reuse does not kick in)."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(min(count, 32)):
+        img = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        frames.append(buf.tobytes())
+    return [frames[i % len(frames)] for i in range(count)]
+
+
+def run_single(frames, session_id):
+    for frame in frames:
+        posture_worker.analyze_frame_bytes_task.run(frame, session_id)
+
+
+def run_batched(frames, session_id, batch_size):
+    for i in range(0, len(frames), batch_size):
+        requests = [SimpleNamespace(args=(frame, session_id)) for frame in frames[i:i + batch_size]]
+        posture_worker.analyze_frame_batch_task.run(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-frame consumer")
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--batch", type=int, default=settings.posture_batch_size)
+    parser.add_argument("--dedup", action="store_true", help="Keep near-duplicate reuse enabled")
+    args = parser.parse_args()
+
+    settings.frame_dedup_enabled = args.dedup
+    frames = make_frames(args.frames)
+
+    db = SessionLocal()
+    session = database.Session(user_id=1, started_at=datetime.utcnow(), status="active")
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+
+    try:
+        # Baseline: per-task INSERT + commit, as before the write-behind buffer
+        settings.posture_log_buffer_enabled = False
+
+        # Warm-up (model load, connections)
+        run_single(frames[:2], session.id)
+
+        start = time.perf_counter()
+        run_single(frames, session.id)
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_batched(frames, session.id, args.batch)
+        batched_s = time.perf_counter() - start
+
+        settings.posture_log_buffer_enabled = True
+        start = time.perf_counter()
+        run_batched(frames, session.id, args.batch)
+        get_log_writer().flush()
+        buffered_s = time.perf_counter() - start
+    finally:
+        session.status = "completed"
+        session.ended_at = datetime.utcnow()
+        db.commit()
+        db.close()
+
+    print(f"\n{'='*60}")
+    print(f"Consumer throughput ({args.frames} frames, batch size {args.batch})")
+    print(f"{'='*60}")
+    print(f"{'mode':<26}{'total s':>10}{'frames/s':>12}{'ms/frame':>12}")
+    for name, secs in (("one task per frame", single_s), ("micro-batched", batched_s),
+                       ("batched + write-behind", buffered_s)):
+        print(f"{name:<26}{secs:>10.2f}{args.frames / secs:>12.1f}{secs / args.frames * 1000:>12.2f}")
+    print(f"\nSpeedup: {single_s / batched_s:.2f}x batched, {single_s / buffered_s:.2f}x with write-behind")
+
+
+if __name__ == "__main__":
+    main()
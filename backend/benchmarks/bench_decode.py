@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Decode Preprocessing Benchmark
+Compares the original pipeline (full-resolution BGR decode + cvtColor) with
+scaled JPEG decode straight to the model's working size and color order.
+
+Latency is measured on every input. Accuracy is measured when the MediaPipe
+model is available and the inputs contain a person: posture status agreement
+and mean absolute angle / landmark deltas versus the full-resolution pipeline.
+
+Usage:
+    python -m benchmarks.bench_decode [images...] [--target 320] [--frames 200]
+
+Without images, synthetic 640x480 and 1280x720 frames are used (latency only).
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.core.frame import Frame
+from app.core.posture_detector import PostureDetector, REQUIRED_LANDMARKS
+
+
+def synthetic_jpeg(width, height, quality=70):
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = ((x + y) / 2).astype(np.uint8)
+    img = np.dstack([base, np.flipud(base), np.fliplr(base)])
+    noise = np.random.default_rng(0).integers(0, 24, img.shape, dtype=np.uint8)
+    ok, buf = cv2.imencode(".jpg", cv2.add(img, noise), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def baseline_decode(jpeg):
+    """Original pipeline: full-res BGR decode, then a full-frame cvtColor."""
+    bgr = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    return Frame(rgb=cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+
+def time_ms(fn, frames):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def compare(detector, jpeg, target):
+    """Return (baseline result, scaled result) from the real model."""
+    full = detector.analyze_frame(baseline_decode(jpeg))
+    scaled = detector.analyze_frame(Frame.from_bytes(jpeg, target))
+    return full, scaled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scaled JPEG decode")
+    parser.add_argument("images", nargs="*", help="JPEG files (default: synthetic frames)")
+    parser.add_argument("--target", type=int, default=320, help="Target long side in px")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.images:
+        inputs = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                inputs.append((path, f.read()))
+    else:
+        inputs = [("synthetic 640x480", synthetic_jpeg(640, 480)),
+                  ("synthetic 1280x720", synthetic_jpeg(1280, 720))]
+
+    detector = PostureDetector()
+    has_model = detector.detector is not None
+
+    print(f"\n{'='*78}")
+    print(f"Decode benchmark (target long side {args.target}px, {args.frames} iterations)")
+    print(f"{'='*78}")
+    print(f"{'input':<28}{'decoded':>12}{'baseline ms':>13}{'scaled ms':>11}{'speedup':>9}")
+
+    agree = total = 0
+    angle_err = []
+    landmark_err = []
+
+    for name, jpeg in inputs:
+        frame = Frame.from_bytes(jpeg, args.target)
+        base_ms = time_ms(lambda: baseline_decode(jpeg).rgb, args.frames)
+        scaled_ms = time_ms(lambda: Frame.from_bytes(jpeg, args.target).rgb, args.frames)
+        decoded = f"{frame.width}x{frame.height}"
+        print(f"{name[-28:]:<28}{decoded:>12}{base_ms:>13.3f}{scaled_ms:>11.3f}{base_ms / scaled_ms:>8.1f}x")
+
+        if not has_model:
+            continue
+
+        # End-to-end latency including inference
+        e2e_base = time_ms(lambda: detector.analyze_frame(baseline_decode(jpeg)), max(args.frames // 10, 5))
+        e2e_scaled = time_ms(lambda: detector.analyze_frame(Frame.from_bytes(jpeg, args.target)), max(args.frames // 10, 5))
+        print(f"{'  + inference':<28}{'':>12}{e2e_base:>13.3f}{e2e_scaled:>11.3f}{e2e_base / e2e_scaled:>8.1f}x")
+
+        full, scaled = compare(detector, jpeg, args.target)
+        if 'landmarks' not in full or 'landmarks' not in scaled:
+            continue
+        total += 1
+        agree += full['posture_status'] == scaled['posture_status']
+        angle_err.append(abs(full['neck_angle'] - scaled['neck_angle']))
+        angle_err.append(abs(full['torso_angle'] - scaled['torso_angle']))
+        for idx in REQUIRED_LANDMARKS:
+            a, b = full['landmarks'][str(idx)], scaled['landmarks'][str(idx)]
+            landmark_err.append(np.hypot(a['x'] - b['x'], a['y'] - b['y']))
+
+    print()
+    if not has_model:
+        print("⚠️  MediaPipe model not found: accuracy comparison skipped.")
+    elif total == 0:
+        print("⚠️  No person detected in inputs: pass real webcam JPEGs for accuracy.")
+    else:
+        print(f"Accuracy vs full-resolution pipeline ({total} frames with a person):")
+        print(f"  status agreement:        {agree / total * 100:.1f}%")
+        print(f"  mean |angle delta|:      {np.mean(angle_err):.2f}°")
+        print(f"  mean landmark delta:     {np.mean(landmark_err) * 100:.2f}% of frame")
+
+
+if __name__ == "__main__":
+    main()
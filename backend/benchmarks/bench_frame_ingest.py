@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Frame Ingestion Benchmark
+Compares the base64/JSON frame path against the raw JPEG bytes path.
+
+Measures, per frame, everything between "bytes arrive at the API" and
+"pixels come out of cv2.imdecode in the worker":
+  - base64: JSON parse -> broker JSON encode/decode -> split(',') -> b64decode -> imdecode
+  - raw:    broker msgpack encode/decode -> imdecode
+
+Usage:
+    python -m benchmarks.bench_frame_ingest [image.jpg] [--frames 500]
+"""
+
+import argparse
+import base64
+import json
+import time
+
+import cv2
+import msgpack
+import numpy as np
+
+
+def load_jpeg(path=None, width=640, height=480, quality=70):
+    """Load a JPEG from disk or synthesize a webcam-like one."""
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+
+    # Gradient + noise compresses roughly like a real webcam frame
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = ((x + y) / 2).astype(np.uint8)
+    img = np.dstack([base, np.flipud(base), np.fliplr(base)])
+    noise = np.random.default_rng(0).integers(0, 24, img.shape, dtype=np.uint8)
+    img = cv2.add(img, noise)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def base64_path(body: bytes):
+    """Current path: JSON body with a data URL, JSON broker message."""
+    request = json.loads(body)
+    message = json.dumps({"args": [request["frame"], request["session_id"]]})
+    frame = json.loads(message)["args"][0]
+    if ',' in frame:
+        frame = frame.split(',')[1]
+    img_bytes = base64.b64decode(frame)
+    return cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+
+def raw_path(body: bytes):
+    """New path: raw JPEG body, msgpack broker message."""
+    message = msgpack.packb({"args": [body, 1]})
+    frame = msgpack.unpackb(message)["args"][0]
+    return cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR)
+
+
+def run(name, fn, body, frames):
+    fn(body)  # warm-up
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(frames):
+        fn(body)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "name": name,
+        "wire_bytes": len(body),
+        "cpu_ms_per_frame": cpu / frames * 1000,
+        "frames_per_sec": frames / wall,
+        "mb_per_sec": len(body) * frames / wall / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame ingestion paths")
+    parser.add_argument("image", nargs="?", help="JPEG file to use (default: synthetic 640x480)")
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    jpeg = load_jpeg(args.image)
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+    json_body = json.dumps({"session_id": 1, "frame": data_url}).encode()
+
+    results = [
+        run("base64 + JSON", base64_path, json_body, args.frames),
+        run("raw bytes", raw_path, jpeg, args.frames),
+    ]
+
+    print(f"\n{'='*72}")
+    print(f"Frame ingestion benchmark ({args.frames} frames, JPEG {len(jpeg)/1024:.1f} KiB)")
+    print(f"{'='*72}")
+    print(f"{'path':<16}{'wire bytes':>12}{'CPU ms/frame':>15}{'frames/s':>12}{'MB/s':>10}")
+    for res in results:
+        print(f"{res['name']:<16}{res['wire_bytes']:>12}{res['cpu_ms_per_frame']:>15.3f}"
+              f"{res['frames_per_sec']:>12.1f}{res['mb_per_sec']:>10.1f}")
+
+    old, new = results
+    print(f"\nWire size: {new['wire_bytes'] / old['wire_bytes'] * 100:.1f}% of base64 path")
+    print(f"CPU/frame: {new['cpu_ms_per_frame'] / old['cpu_ms_per_frame'] * 100:.1f}% of base64 path")
+
+
+if __name__ == "__main__":
+    main()
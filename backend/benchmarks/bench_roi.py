@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+ROI Inference Benchmark
+Compares full-frame inference with ROI-cropped inference around the last
+known body box, at typical webcam resolutions (640x480 and 1280x720).
+
+Needs the MediaPipe model and a JPEG containing a seated person; the image is
+resized to each resolution, JPEG-encoded and decoded through Frame.from_bytes
+like the worker does (scaled decode to frame_decode_target_size by default),
+then fed repeatedly as one session. --full-res adds rows decoded at full size.
+
+Usage:
+    python -m benchmarks.bench_roi person.jpg [--frames 100] [--full-res]
+"""
+
+import argparse
+import time
+
+import cv2
+
+from app.core.config import settings
+from app.core.frame import Frame
+from app.core.posture_detector import PostureDetector
+
+RESOLUTIONS = [(640, 480), (1280, 720)]
+
+
+def time_ms(fn, frames):
+    fn()  # warm-up (also primes the ROI box)
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ROI-cropped inference")
+    parser.add_argument("image", help="JPEG with a person in view")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--full-res", action="store_true", help="Also benchmark full-resolution decodes")
+    args = parser.parse_args()
+
+    targets = [settings.frame_decode_target_size] + ([0] if args.full_res else [])
+
+    source = cv2.imread(args.image, cv2.IMREAD_COLOR)
+    if source is None:
+        print(f"❌ Could not read {args.image}")
+        return
+
+    # Full-frame baseline: IMAGE mode, no ROI, no tracking
+    settings.detector_video_mode = False
+    settings.detector_roi_mode = False
+    full_detector = PostureDetector()
+    if full_detector.detector is None:
+        print("❌ MediaPipe model not found")
+        return
+
+    settings.detector_roi_mode = True
+    roi_detector = PostureDetector()
+
+    print(f"\n{'='*70}")
+    print(f"ROI inference benchmark ({args.frames} frames per resolution)")
+    print(f"{'='*70}")
+    print(f"{'resolution':<14}{'decoded':>10}{'full ms':>10}{'ROI ms':>10}{'speedup':>10}{'crop':>12}{'status':>12}")
+
+    session_id = 0
+    for width, height in RESOLUTIONS:
+        ok, jpeg = cv2.imencode(".jpg", cv2.resize(source, (width, height)), [cv2.IMWRITE_JPEG_QUALITY, 85])
+        for target in targets:
+            session_id += 1
+            # Same decode path as the worker (decoded once per frame, outside the timing)
+            frame = Frame.from_bytes(jpeg.tobytes(), target_size=target)
+
+            full_ms = time_ms(lambda: full_detector.analyze_frame(frame), args.frames)
+            roi_ms = time_ms(lambda: roi_detector.analyze_frame(frame, session_id=session_id), args.frames)
+
+            box = roi_detector.roi.crop_box(session_id, frame.width, frame.height)
+            crop = f"{box[2] - box[0]}x{box[3] - box[1]}" if box else "none"
+            status = roi_detector.analyze_frame(frame, session_id=session_id)['posture_status']
+            decoded = f"{frame.width}x{frame.height}"
+            print(f"{width}x{height:<9}{decoded:>10}{full_ms:>10.2f}{roi_ms:>10.2f}{full_ms / roi_ms:>9.2f}x"
+                  f"{crop:>12}{status:>12}")
+
+    print("\nROI hits/fallbacks are recorded under the 'roi' group at GET /api/v1/metrics/.")
+
+
+if __name__ == "__main__":
+    main()
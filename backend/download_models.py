@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Download the MediaPipe pose landmarker models (lite, full, heavy) into
+MODELS_DIR (settings.models_dir, default app/models). Adaptive tiers (detector_adaptive_tiers) can only step down to
+tiers whose file is present. Existing files are kept.
+
+Usage:
+    python download_models.py [--tiers lite full heavy] [--force]
+"""
+
+import argparse
+import os
+import urllib.request
+
+from app.core.model_tiers import MODEL_TIERS
+from app.core.posture_detector import MODELS_DIR
+
+MODEL_URL = ("https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
+             "pose_landmarker_{tier}/float16/latest/pose_landmarker_{tier}.task")
+
+
+def download(tier: str, force: bool = False) -> str:
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = os.path.join(MODELS_DIR, f"pose_landmarker_{tier}.task")
+    if os.path.exists(path) and not force:
+        print(f"✓ {tier}: already present")
+        return path
+
+    print(f"⬇️  {tier}: downloading...")
+    # Download next to the target, then rename, so a failed download leaves nothing behind
+    urllib.request.urlretrieve(MODEL_URL.format(tier=tier), path + ".part")
+    os.replace(path + ".part", path)
+    print(f"✓ {tier}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download MediaPipe pose landmarker models")
+    parser.add_argument("--tiers", nargs="+", choices=MODEL_TIERS, default=list(MODEL_TIERS))
+    parser.add_argument("--force", action="store_true", help="Download again even if the file exists")
+    args = parser.parse_args()
+
+    for tier in args.tiers:
+        download(tier, args.force)
@@ -0,0 +1,18 @@
+import argparse
+
+from app.workers.reclassify_worker import reclassify_posture_logs, reclassify_posture_logs_task
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-classify historical posture logs")
+    parser.add_argument("--version", type=int, default=None, help="Classifier version (default: settings.classifier_version)")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--inline", action="store_true", help="Run here instead of queueing a Celery task")
+    args = parser.parse_args()
+
+    if args.inline:
+        print(reclassify_posture_logs(args.version, args.chunk_size))
+    else:
+        print("🚀 Queueing posture log re-classification...")
+        result = reclassify_posture_logs_task.delay(version=args.version, chunk_size=args.chunk_size)
+        print(f"✅ Task queued! Task ID: {result.id}")
+        print("Check 'celery-worker' logs to see progress.")
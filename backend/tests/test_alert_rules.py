@@ -0,0 +1,46 @@
+"""
+Alert step script against an in-memory Redis (fakeredis with Lua support).
+Run from backend/: python -m pytest tests
+"""
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from app.core.alert_rules import AlertEngine, rules_from_preferences
+
+
+@pytest.fixture
+def engine():
+    return AlertEngine(fakeredis.FakeStrictRedis(decode_responses=True))
+
+
+def step(engine, status, now, rules, session_id=1):
+    return engine.evaluate([(session_id, status, rules)], now)[0]
+
+
+def test_slouch_fires_after_threshold(engine):
+    rules = rules_from_preferences({"alerts": {"slouch_seconds": 10, "break_minutes": 0}})
+    assert step(engine, "SLOUCHING", 1000, rules) == []
+    assert step(engine, "SLOUCHING", 1005, rules) == []
+    assert step(engine, "SLOUCHING", 1011, rules) == ["SLOUCH_ALERT"]
+
+
+def test_break_away_zero_does_not_reset_streaks(engine):
+    # break_away_seconds 0 must not turn every frame gap into a break
+    rules = rules_from_preferences({"alerts": {"slouch_seconds": 10, "too_close_seconds": 10,
+                                               "break_minutes": 0, "break_away_seconds": 0}})
+    assert step(engine, "SLOUCHING", 1000, rules) == []
+    assert step(engine, "SLOUCHING", 1005, rules) == []
+    assert step(engine, "SLOUCHING", 1011, rules) == ["SLOUCH_ALERT"]
+
+    assert step(engine, "TOO_CLOSE", 2000, rules, session_id=2) == []
+    assert step(engine, "TOO_CLOSE", 2011, rules, session_id=2) == ["DISTANCE_WARNING"]
+
+
+def test_gap_without_frames_counts_as_break(engine):
+    rules = rules_from_preferences({"alerts": {"break_minutes": 50, "break_away_seconds": 120}})
+    assert step(engine, "GOOD", 1000, rules) == []
+    # Two hours without any frame, then the user is back
+    assert step(engine, "GOOD", 1000 + 7200, rules) == []
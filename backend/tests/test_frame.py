@@ -0,0 +1,58 @@
+"""
+Round-trip JPEG decoding through Frame.from_bytes.
+Run from backend/: python -m pytest tests
+"""
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from app.core.frame import Frame, jpeg_size
+
+
+def _jpeg(width: int = 640, height: int = 480) -> bytes:
+    # Left half red, right half blue (BGR), so a channel swap is detectable
+    bgr = np.zeros((height, width, 3), np.uint8)
+    bgr[:, : width // 2] = (0, 0, 255)
+    bgr[:, width // 2:] = (255, 0, 0)
+    ok, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    return buf.tobytes()
+
+
+def test_jpeg_size():
+    assert jpeg_size(_jpeg(640, 480)) == (640, 480)
+    assert jpeg_size(b"not a jpeg") is None
+
+
+@pytest.mark.parametrize("target_size, scale", [(0, 1), (320, 2), (160, 4), (80, 8)])
+def test_from_bytes_scaled_decode(target_size, scale):
+    frame = Frame.from_bytes(_jpeg(), target_size=target_size)
+
+    assert frame is not None
+    assert frame.scale == scale
+    assert (frame.width, frame.height) == (640 // scale, 480 // scale)
+
+    # RGB and BGR views hold the right channel order
+    left_rgb = frame.rgb[frame.height // 2, frame.width // 4]
+    left_bgr = frame.bgr[frame.height // 2, frame.width // 4]
+    assert left_rgb[0] > 200 and left_rgb[2] < 50
+    assert left_bgr[2] > 200 and left_bgr[0] < 50
+
+
+def test_full_resolution_redecodes_reduced_frame():
+    data = _jpeg()
+    reduced = Frame.from_bytes(data, target_size=160)
+    full = reduced.full_resolution()
+
+    assert (full.width, full.height) == (640, 480)
+    assert full.scale == 1
+
+    unreduced = Frame.from_bytes(data, target_size=0)
+    assert unreduced.encoded is None
+    assert unreduced.full_resolution() is unreduced
+
+
+def test_from_bytes_rejects_garbage():
+    assert Frame.from_bytes(b"\xff\xd8garbage", target_size=0) is None